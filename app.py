@@ -8,16 +8,18 @@ the processed video with captions.
 """
 
 import os
+import glob
+import json
+import time
 import uuid
+import shutil
+import secrets
 import threading
 from pathlib import Path
-from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory, jsonify
-from flask_wtf import FlaskForm
-from flask_wtf.file import FileField, FileAllowed, FileRequired
-from wtforms import StringField, SubmitField, SelectField
-from wtforms.validators import DataRequired, Optional, URL
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, send_file, jsonify, abort, session
 from werkzeug.utils import secure_filename
-from process_video_with_captions import VideoProcessor
+from process_video_with_captions import VideoProcessor, YOUTUBE_URL_RE
+from job_store import create_job_store
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -25,42 +27,50 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'development-key')
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB limit
 
+ALLOWED_VIDEO_EXTENSIONS = ['mp4', 'mov', 'avi', 'mkv']
+CAPTION_FORMATS = ['srt', 'vtt']
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Read streamed uploads 1MB at a time
+JOB_EVENTS_KEEPALIVE = 15  # Seconds between keep-alive comments on idle event streams
+RESULT_MAX_AGE = 3600  # Seconds browsers may cache result files (job outputs never change)
+JOB_TTL_SECONDS = int(os.environ.get('JOB_TTL_SECONDS', '3600'))  # Finished jobs and their files are removed after this
+JOB_SWEEP_INTERVAL = 60  # Seconds between sweeps for expired jobs
+
 # Create uploads directory if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-# Dictionary to track job status and results
-jobs = {}
-
-class ProcessVideoForm(FlaskForm):
-    """Form for processing videos"""
-    youtube_url = StringField('YouTube URL', validators=[Optional(), URL()])
-    video_file = FileField('Upload Video', validators=[
-        Optional(),
-        FileAllowed(['mp4', 'mov', 'avi', 'mkv'], 'Videos only!')
-    ])
-    caption_format = SelectField(
-        'Caption Format',
-        choices=[('srt', 'SRT'), ('vtt', 'WebVTT')],
-        default='srt'
-    )
-    submit = SubmitField('Process Video')
-
-    def validate(self, **kwargs):
-        """Custom validator to ensure either YouTube URL or file upload is provided"""
-        if not super().validate():
-            return False
-        if not self.youtube_url.data and not self.video_file.data:
-            flash('Please provide either a YouTube URL or upload a video file.')
-            return False
-        if self.youtube_url.data and self.video_file.data:
-            flash('Please provide either a YouTube URL or upload a video file, not both.')
-            return False
-        return True
+# Track job status and results (in memory, or in Redis when REDIS_URL is set)
+jobs = create_job_store()
+
+# With Redis available, videos are processed by separate RQ workers
+# (`rq worker videos`) instead of threads inside the web process
+task_queue = None
+if os.environ.get('REDIS_URL'):
+    from redis import Redis
+    from rq import Queue
+    task_queue = Queue('videos', connection=Redis.from_url(os.environ['REDIS_URL']))
+
+def csrf_token():
+    """Return the CSRF token for this session, creating it on first use"""
+    if 'csrf_token' not in session:
+        session['csrf_token'] = secrets.token_urlsafe(32)
+    return session['csrf_token']
+
+def check_csrf(token):
+    """Abort the request unless the token matches the one in the (signed) session cookie"""
+    expected = session.get('csrf_token')
+    if not expected or not token or not secrets.compare_digest(expected, token):
+        abort(400, 'Invalid CSRF token.')
+
+app.jinja_env.globals['csrf_token'] = csrf_token
+
+def is_allowed_video(filename):
+    """Check the file extension against ALLOWED_VIDEO_EXTENSIONS"""
+    return filename.rsplit('.', 1)[-1].lower() in ALLOWED_VIDEO_EXTENSIONS
 
 def process_video_task(job_id, input_source, output_format, project_id=None):
     """Background task to process a video"""
     try:
-        jobs[job_id]['status'] = 'processing'
+        jobs.update(job_id, status='processing')
         
         # Initialize the processor
         processor = VideoProcessor(project_id=project_id)
@@ -72,123 +82,288 @@ def process_video_task(job_id, input_source, output_format, project_id=None):
             output_format=output_format
         )
         
-        # Store results
-        jobs[job_id]['status'] = 'completed'
-        jobs[job_id]['result_files'] = result_files
-        
-        # Include token usage data if available
-        if 'token_usage' in result_files:
-            jobs[job_id]['token_usage'] = result_files['token_usage']
-        
-        jobs[job_id]['error'] = None
+        # Store results (token usage data is included if available)
+        jobs.update(
+            job_id,
+            status='completed',
+            result_files=result_files,
+            token_usage=result_files.get('token_usage'),
+            error=None,
+            completed_at=time.time()
+        )
         
     except Exception as e:
-        jobs[job_id]['status'] = 'failed'
-        jobs[job_id]['error'] = str(e)
+        jobs.update(job_id, status='failed', error=str(e), completed_at=time.time())
+
+def start_job(job_id, source_type, input_source, output_format):
+    """Register a job and start processing it in the background"""
+    jobs.create(job_id, {
+        'id': job_id,
+        'source_type': source_type,
+        'input_source': input_source,
+        'format': output_format,
+        'status': 'queued',
+        'result_files': None,
+        'error': None
+    })
+    enqueue_video_task(job_id, input_source, output_format)
+
+def enqueue_video_task(job_id, input_source, output_format):
+    """Hand a video off to an RQ worker, or to a background thread without Redis"""
+    if task_queue is not None:
+        # By name, since under `python app.py` the function lives in __main__,
+        # which the workers cannot import
+        task_queue.enqueue('app.process_video_task', job_id, input_source, output_format, job_timeout='30m')
+        return
+    
+    thread = threading.Thread(
+        target=process_video_task,
+        args=(job_id, input_source, output_format)
+    )
+    thread.daemon = True
+    thread.start()
+
+def remove_job_files(job_id):
+    """Delete the uploaded source video and the output folder of a job"""
+    for path in glob.glob(os.path.join(app.config['UPLOAD_FOLDER'], f"{job_id}_*")):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    shutil.rmtree(os.path.join('output', job_id), ignore_errors=True)
+
+def sweep_expired_jobs():
+    """Remove jobs that finished more than JOB_TTL_SECONDS ago, along with their files"""
+    cutoff = time.time() - JOB_TTL_SECONDS
+    for job_id in jobs.job_ids():
+        job = jobs.get(job_id)
+        if job is None or job['status'] not in ('completed', 'failed'):
+            continue
+        if job.get('completed_at', 0) < cutoff:
+            jobs.delete(job_id)
+            remove_job_files(job_id)
+
+def start_job_sweeper():
+    """Periodically sweep expired jobs in a daemon thread"""
+    def run():
+        while True:
+            time.sleep(JOB_SWEEP_INTERVAL)
+            try:
+                sweep_expired_jobs()
+            except Exception as e:
+                print(f"Error sweeping expired jobs: {str(e)}")
+    
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+
+# RQ workers import this module too, so the sweeper is started with the
+# first request rather than at import time to keep it in the web process
+sweeper_lock = threading.Lock()
+sweeper_started = False
 
-@app.route('/', methods=['GET', 'POST'])
+@app.before_request
+def ensure_job_sweeper():
+    """Start the job sweeper once per web process"""
+    global sweeper_started
+    if sweeper_started:
+        return
+    with sweeper_lock:
+        if not sweeper_started:
+            start_job_sweeper()
+            sweeper_started = True
+
+@app.route('/')
 def index():
     """Home page with video processing form"""
-    form = ProcessVideoForm()
+    return render_template('index.html')
+
+@app.route('/submit', methods=['POST'])
+def submit():
+    """Validate the video processing form and start a job"""
+    check_csrf(request.form.get('csrf_token'))
     
-    if form.validate_on_submit():
-        # Generate a unique job ID
-        job_id = str(uuid.uuid4())
-        
-        if form.youtube_url.data:
-            input_source = form.youtube_url.data
-            source_type = 'youtube'
-        else:
-            # Save uploaded file
-            video_file = form.video_file.data
-            filename = secure_filename(video_file.filename)
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{job_id}_{filename}")
-            video_file.save(file_path)
-            input_source = file_path
-            source_type = 'upload'
-        
-        # Initialize job tracking
-        jobs[job_id] = {
-            'id': job_id,
-            'source_type': source_type,
-            'input_source': input_source,
-            'format': form.caption_format.data,
-            'status': 'queued',
-            'result_files': None,
-            'error': None
-        }
-        
-        # Start processing in background thread
-        thread = threading.Thread(
-            target=process_video_task,
-            args=(job_id, input_source, form.caption_format.data)
-        )
-        thread.daemon = True
-        thread.start()
-        
-        # Redirect to results page
-        return redirect(url_for('results', job_id=job_id))
+    youtube_url = request.form.get('youtube_url', '').strip()
+    video_file = request.files.get('video_file')
+    caption_format = request.form.get('caption_format', 'srt')
+    
+    # Validate the form
+    error = None
+    if not youtube_url and not video_file:
+        error = 'Please provide either a YouTube URL or upload a video file.'
+    elif youtube_url and video_file:
+        error = 'Please provide either a YouTube URL or upload a video file, not both.'
+    elif youtube_url and not YOUTUBE_URL_RE.match(youtube_url):
+        error = 'Invalid YouTube URL.'
+    elif video_file and not is_allowed_video(video_file.filename):
+        error = 'Videos only!'
+    elif caption_format not in CAPTION_FORMATS:
+        error = f'Unsupported caption format: {caption_format}'
+    
+    if error:
+        flash(error)
+        return redirect(url_for('index'))
+    
+    # Generate a unique job ID
+    job_id = str(uuid.uuid4())
+    
+    if youtube_url:
+        input_source = youtube_url
+        source_type = 'youtube'
+    else:
+        # Save uploaded file
+        filename = secure_filename(video_file.filename)
+        file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{job_id}_{filename}")
+        video_file.save(file_path)
+        input_source = file_path
+        source_type = 'upload'
     
-    return render_template('index.html', form=form)
+    # Initialize job tracking and start processing in the background
+    start_job(job_id, source_type, input_source, caption_format)
+    
+    # Redirect to results page
+    return redirect(url_for('results', job_id=job_id))
+
+@app.route('/upload-stream/<fmt>', methods=['POST'])
+def upload_stream(fmt):
+    """
+    Accept a video sent as the raw request body and start processing it.
+    
+    The body is copied to disk in fixed-size chunks straight from the request
+    stream, bypassing the multipart form parser so large uploads never have
+    to be buffered in memory.
+    """
+    check_csrf(request.headers.get('X-CSRFToken'))
+    
+    if fmt not in CAPTION_FORMATS:
+        abort(400, f'Unsupported caption format: {fmt}')
+    
+    filename = secure_filename(request.args.get('filename', ''))
+    if not is_allowed_video(filename):
+        abort(400, 'Videos only!')
+    
+    if request.content_length and request.content_length > app.config['MAX_CONTENT_LENGTH']:
+        abort(413)
+    
+    job_id = str(uuid.uuid4())
+    file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{job_id}_{filename}")
+    
+    try:
+        with open(file_path, 'wb') as f:
+            while chunk := request.stream.read(UPLOAD_CHUNK_SIZE):
+                f.write(chunk)
+    except Exception:
+        # Client disconnected or the body went over the limit; no job owns the
+        # partial file, so the sweeper would never remove it
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    
+    start_job(job_id, 'upload', file_path, fmt)
+    
+    return jsonify({
+        'job_id': job_id,
+        'results_url': url_for('results', job_id=job_id)
+    })
 
 @app.route('/results/<job_id>')
 def results(job_id):
     """Results page showing processing status and video player"""
-    if job_id not in jobs:
+    job = jobs.get(job_id)
+    if job is None:
         flash('Job not found.')
         return redirect(url_for('index'))
     
-    return render_template('results.html', job=jobs[job_id])
+    return render_template('results.html', job=job)
 
 @app.route('/job-status/<job_id>')
 def job_status(job_id):
     """API endpoint to check job status"""
-    if job_id not in jobs:
+    job = jobs.get(job_id)
+    if job is None:
         return jsonify({'status': 'not_found'})
     
     return jsonify({
-        'status': jobs[job_id]['status'],
-        'error': jobs[job_id]['error']
+        'status': job['status'],
+        'error': job['error']
     })
 
+@app.route('/job-events/<job_id>')
+def job_events(job_id):
+    """Server-Sent Events stream that pushes job status changes to the browser"""
+    def stream():
+        status = None
+        while True:
+            job = jobs.wait_for_change(job_id, status, timeout=JOB_EVENTS_KEEPALIVE)
+            if job is None:
+                yield f"data: {json.dumps({'status': 'not_found'})}\n\n"
+                return
+            
+            if job['status'] == status:
+                # Nothing changed; keep the connection alive through proxies
+                yield ": keep-alive\n\n"
+                continue
+            
+            status = job['status']
+            yield f"data: {json.dumps({'status': status, 'error': job['error']})}\n\n"
+            if status in ('completed', 'failed'):
+                return
+    
+    return Response(
+        stream(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/video/<job_id>')
 def video(job_id):
     """Serve the processed video file"""
-    if job_id not in jobs or jobs[job_id]['status'] != 'completed':
+    job = jobs.get(job_id)
+    if job is None or job['status'] != 'completed':
         return "Video not ready or job not found", 404
     
-    video_path = jobs[job_id]['result_files']['video_with_captions']
-    directory, filename = os.path.split(video_path)
+    video_path = os.path.abspath(job['result_files']['video_with_captions'])
     
-    return send_from_directory(directory, filename)
+    # Conditional responses answer Range requests, so seeking in the player
+    # only fetches the bytes it needs instead of the whole video
+    return send_file(video_path, conditional=True, etag=True, max_age=RESULT_MAX_AGE)
 
 @app.route('/captions/<job_id>')
 def captions(job_id):
     """Serve the caption file for the video"""
-    if job_id not in jobs or jobs[job_id]['status'] != 'completed':
+    job = jobs.get(job_id)
+    if job is None or job['status'] != 'completed':
         return "Captions not ready or job not found", 404
     
-    caption_path = jobs[job_id]['result_files']['captions']
-    directory, filename = os.path.split(caption_path)
+    caption_path = os.path.abspath(job['result_files']['captions'])
     
     # Set the MIME type based on the caption format
     mime_types = {
         'srt': 'text/srt',
         'vtt': 'text/vtt'
     }
-    caption_format = jobs[job_id]['format']
+    caption_format = job['format']
     
-    return send_from_directory(
-        directory, 
-        filename, 
-        mimetype=mime_types.get(caption_format, 'text/plain')
+    return send_file(
+        caption_path,
+        mimetype=mime_types.get(caption_format, 'text/plain'),
+        conditional=True,
+        etag=True,
+        max_age=RESULT_MAX_AGE
     )
 
 @app.route('/clear-job/<job_id>')
 def clear_job(job_id):
-    """Clear a completed job from memory"""
-    if job_id in jobs:
-        del jobs[job_id]
+    """Clear a finished job and delete its files"""
+    job = jobs.get(job_id)
+    if job is not None and job['status'] not in ('completed', 'failed'):
+        # The worker is still writing to the job's files
+        flash('This job is still processing and cannot be cleared yet.')
+        return redirect(url_for('results', job_id=job_id))
+    
+    jobs.delete(job_id)
+    # Nothing else will find the files once the job is gone from the store
+    remove_job_files(job_id)
     return redirect(url_for('index'))
 
 if __name__ == '__main__':
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Job Store
+
+Keeps track of video processing jobs for the web interface. Jobs are kept
+in process memory by default. When the REDIS_URL environment variable is
+set they are stored in Redis instead, so that several web workers and the
+RQ worker processes all see the same job state and jobs survive restarts.
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class InMemoryJobStore:
+    """Job store backed by a dictionary in the current process."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+        # Notified whenever a job changes, so watchers don't have to poll
+        self._changed = threading.Condition(self._lock)
+
+    def create(self, job_id: str, job: Dict[str, Any]):
+        """Register a new job."""
+        with self._lock:
+            self._jobs[job_id] = dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the job, or None if it does not exist."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def update(self, job_id: str, **fields):
+        """Update fields of an existing job."""
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+                self._changed.notify_all()
+
+    def delete(self, job_id: str):
+        """Remove a job if it exists."""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            self._changed.notify_all()
+
+    def job_ids(self) -> List[str]:
+        """Return the IDs of all known jobs."""
+        with self._lock:
+            return list(self._jobs)
+
+    def wait_for_change(self, job_id: str, status: Optional[str], timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Block until the job's status differs from `status` or the timeout expires.
+        
+        Returns:
+            A copy of the job, or None if it does not exist
+        """
+        def changed():
+            job = self._jobs.get(job_id)
+            return job is None or job['status'] != status
+        
+        with self._changed:
+            self._changed.wait_for(changed, timeout)
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+
+class RedisJobStore:
+    """Job store backed by one Redis hash per job (jobs:<job_id>)."""
+
+    def __init__(self, redis_url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("REDIS_URL is set but the redis package is not installed. "
+                               "Please install using: pip install -r requirements.txt")
+        self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+
+    def _key(self, job_id: str) -> str:
+        return f"jobs:{job_id}"
+
+    def _channel(self, job_id: str) -> str:
+        return f"jobs:{job_id}:events"
+
+    def create(self, job_id: str, job: Dict[str, Any]):
+        """Register a new job."""
+        self.redis.hset(self._key(job_id), mapping={k: json.dumps(v) for k, v in job.items()})
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job, or None if it does not exist."""
+        data = self.redis.hgetall(self._key(job_id))
+        if not data:
+            return None
+        return {k: json.loads(v) for k, v in data.items()}
+
+    def update(self, job_id: str, **fields):
+        """Update fields of an existing job."""
+        key = self._key(job_id)
+        if self.redis.exists(key):
+            self.redis.hset(key, mapping={k: json.dumps(v) for k, v in fields.items()})
+            self.redis.publish(self._channel(job_id), 'changed')
+
+    def delete(self, job_id: str):
+        """Remove a job if it exists."""
+        self.redis.delete(self._key(job_id))
+        self.redis.publish(self._channel(job_id), 'deleted')
+
+    def job_ids(self) -> List[str]:
+        """Return the IDs of all known jobs."""
+        return [key.split(':', 1)[1] for key in self.redis.scan_iter(match=self._key('*'))]
+
+    def wait_for_change(self, job_id: str, status: Optional[str], timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Block until the job's status differs from `status` or the timeout expires.
+        
+        Returns:
+            The job, or None if it does not exist
+        """
+        deadline = time.monotonic() + timeout
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self._channel(job_id))
+        try:
+            # Read the job only after subscribing so no change notification is missed
+            job = self.get(job_id)
+            while job is not None and job['status'] == status:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                pubsub.get_message(timeout=remaining)
+                job = self.get(job_id)
+            return job
+        finally:
+            pubsub.close()
+
+
+def create_job_store():
+    """Create the job store configured by the environment."""
+    redis_url = os.environ.get('REDIS_URL')
+    if redis_url:
+        return RedisJobStore(redis_url)
+    return InMemoryJobStore()
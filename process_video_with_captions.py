@@ -12,16 +12,23 @@ Eliminates redundancy in the original separate scripts.
 """
 
 import os
+import re
 import sys
 import argparse
+import uuid
+import hashlib
 import tempfile
+import queue
+import threading
 import subprocess
-from pathlib import Path
-from urllib.parse import urlparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from operator import attrgetter, itemgetter
 import base64
 import json
-from typing import List, Dict, Tuple, Optional
-from shutil import which
+from typing import List, Dict, Tuple, Optional, TextIO
+from shutil import which, copyfile
 
 # Import vertex libraries
 from vertex_libs.gemini_client import GeminiClient, TokenCount
@@ -29,14 +36,219 @@ from google.genai import types
 
 # Third-party libraries for video/audio processing
 try:
-    import yt_dlp
-    from moviepy.editor import VideoFileClip
-    from pydub import AudioSegment
+    import orjson
+    import numpy as np
 except ImportError:
     print("Error: Required libraries not found. Please install using:")
     print("pip install -r requirements.txt")
     sys.exit(1)
 
+# Full paths of the ffmpeg tools, resolved once instead of on every run (None if missing)
+FFMPEG_BIN = which("ffmpeg")
+FFPROBE_BIN = which("ffprobe")
+
+# Sample rate used for the extracted audio track
+AUDIO_SAMPLE_RATE = 16000
+
+# Matches YouTube video URLs (watch, shorts, embed, live and youtu.be links,
+# including the m. mobile host) and captures the 11 character video ID
+YOUTUBE_URL_RE = re.compile(
+    r'^https?://(?:(?:www|m)\.)?'
+    r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/)|youtu\.be/)'
+    r'([\w-]{11})'
+)
+
+
+# Generous estimate of the extracted MP3 bitrate, used to size read buffers
+MP3_BYTES_PER_SECOND = 8 * 1024
+
+# Upper bound on the audio bytes inlined in one Gemini request (the API caps
+# the whole request at 20 MB)
+MAX_REQUEST_AUDIO_BYTES = 18 * 1024 * 1024
+
+# Response schemas for Gemini's JSON mode
+SEGMENT_LIST_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "text": {"type": "STRING"},
+            "start": {"type": "NUMBER"},
+            "end": {"type": "NUMBER"},
+            "type": {"type": "STRING"}
+        },
+        "required": ["text", "start", "end", "type"]
+    }
+}
+TRANSCRIPTION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "chunks": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "chunk_index": {"type": "INTEGER"},
+                    "segments": SEGMENT_LIST_SCHEMA
+                },
+                "required": ["chunk_index", "segments"]
+            }
+        }
+    },
+    "required": ["chunks"]
+}
+
+# Full scale of 16-bit PCM samples, the 0 dBFS reference
+PCM_FULL_SCALE = 32768.0
+
+# Audio quieter than this (dBFS) is captioned as silence without asking Gemini
+SILENT_AUDIO_DBFS = -55
+
+# Duration given to caption segments that arrive with zero or negative length
+MIN_SEGMENT_MS = 1000
+
+# Timing rules applied to the final caption track (seconds)
+CAPTION_MERGE_GAP = 0.3     # Join speech captions separated by less than this
+CAPTION_MIN_DURATION = 1.2
+CAPTION_MAX_DURATION = 7.0
+CAPTION_SPACING = 0.05      # Minimum gap left before the next caption
+
+# Zero-padded numbers for caption timestamps, so formatting is a table lookup
+_PAD2 = [f"{i:02d}" for i in range(100)]
+_PAD3 = [f"{i:03d}" for i in range(1000)]
+
+# Caption styling by segment type; text that is already styled is left alone.
+# SRT doesn't support much styling, but we ensure proper formatting
+_SRT_STYLERS = {
+    "music": lambda text: text if text.startswith("[♪") else f"[♪ {text} ♪]",
+    "sound": lambda text: text if text.startswith("[Sound:") else f"[Sound: {text}]",
+    "silence": lambda text: text if text.startswith("[") else f"[{text}]",
+}
+
+# WebVTT supports more styling options
+_VTT_STYLERS = {
+    "music": lambda text: text if text.startswith("[♪") else f"<i>[♪ {text} ♪]</i>",  # Italics for music
+    "sound": lambda text: text if text.startswith("[Sound:") else f"<b>[Sound: {text}]</b>",  # Bold for sound effects
+    "silence": _SRT_STYLERS["silence"],
+}
+
+
+@dataclass
+class Segment:
+    """A caption segment with validated timing in whole milliseconds."""
+    __slots__ = ("start_ms", "end_ms", "text", "type")
+    start_ms: int
+    end_ms: int
+    text: str
+    type: str
+
+
+class _BufferPool:
+    """Reusable bytearrays for reading ffmpeg output without reallocating per read."""
+
+    def __init__(self, default_size: int, max_buffers: int):
+        self.default_size = default_size
+        self._buffers = queue.LifoQueue(maxsize=max_buffers)
+
+    def get(self) -> bytearray:
+        """Take a buffer from the pool, or allocate a new one if it is empty."""
+        try:
+            return self._buffers.get_nowait()
+        except queue.Empty:
+            return bytearray(self.default_size)
+
+    def put(self, buf: bytearray):
+        """Return a buffer to the pool (dropped if the pool is full)."""
+        try:
+            self._buffers.put_nowait(buf)
+        except queue.Full:
+            pass
+
+    def read_all(self, stream) -> bytes:
+        """Read a binary stream to EOF through a pooled buffer."""
+        buf = self.get()
+        size = 0
+        try:
+            while True:
+                if size == len(buf):
+                    # Grow in place; the larger buffer is kept for later reads
+                    buf.extend(bytes(max(len(buf), self.default_size)))
+                with memoryview(buf) as view, view[size:] as free:
+                    count = stream.readinto(free)
+                if not count:
+                    break
+                size += count
+            with memoryview(buf) as view:
+                return view[:size].tobytes()
+        finally:
+            self.put(buf)
+
+
+def _dbfs(samples: np.ndarray) -> float:
+    """Loudness of 16-bit PCM samples in dBFS (-inf for silence or no samples)."""
+    if samples.size == 0:
+        return float("-inf")
+    rms = np.sqrt(np.mean(np.square(samples, dtype=np.float32)))
+    if rms == 0:
+        return float("-inf")
+    return float(20 * np.log10(rms / PCM_FULL_SCALE))
+
+
+def _run_ffmpeg(cmd: List[str], stdin=None):
+    """
+    Run an ffmpeg command, keeping only the tail of its log for error reporting.
+    
+    stderr is drained while ffmpeg runs, so long runs can't fill the pipe and
+    their log isn't buffered in memory. The log is kept as bytes and only
+    decoded if ffmpeg fails.
+    
+    Args:
+        cmd: ffmpeg command line
+        stdin: Optional file object to feed to ffmpeg's stdin
+        
+    Raises:
+        subprocess.CalledProcessError: If ffmpeg fails; stderr holds the last log lines
+    """
+    with subprocess.Popen(cmd, stdin=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE) as process:
+        log_tail = deque(process.stderr, maxlen=256)
+    if process.returncode != 0:
+        raise _ffmpeg_error(process.returncode, cmd, log_tail)
+
+
+def _ffmpeg_error(returncode: int, cmd: List[str], log_lines) -> subprocess.CalledProcessError:
+    """Build the error for a failed ffmpeg run from its log lines (bytes), keeping only the tail."""
+    log_tail = deque(log_lines, maxlen=256)
+    stderr = b"".join(log_tail).decode("utf-8", errors="replace")
+    return subprocess.CalledProcessError(returncode, cmd, stderr=stderr)
+
+
+def _chunk_file_stem(start_ms: int) -> str:
+    """File name stem for an audio chunk, zero padded so names sort in time order."""
+    return f"chunk_{start_ms:010d}"
+
+# Transcription instructions shared by every request. They are part of the
+# transcription cache key, so editing them invalidates cached results.
+TRANSCRIPTION_PROMPT = """
+        Please transcribe this audio for captioning TV shows, videocasts, or webnovels, with accurate timestamps.
+        
+        IMPORTANT: In addition to speech, also identify:
+        - Music: Describe the music style or mood and mark as "[♪ Upbeat jazz music ♪]" or similar
+        - Sound effects: Describe important sounds and mark as "[Sound: door slamming]" or similar
+        - Ambient noise: Note significant background sounds like "[Crowd chattering]"
+        - Silence: If there's silence but contextually important, indicate as "[Silence]" or "[Tense silence]"
+        
+        Ensure each caption segment is self-contained and meaningful to viewers. Split long sentences at natural breaks.
+        
+        Each caption segment is a JSON object containing:
+        1. "text": The transcribed text, including speech AND non-speech elements
+        2. "start": Start time in seconds (relative to the start of its audio chunk)
+        3. "end": End time in seconds (relative to the start of its audio chunk)
+        4. "type": "speech" for spoken dialogue, "music" for music, "sound" for sound effects, "silence" for meaningful silence
+        
+        For audio content you can't understand clearly, mark it as "[unintelligible]".
+        Make sure the timestamps are accurate and reflect the actual timing of speech and sounds.
+        """
+
 
 class VideoProcessor:
     """
@@ -44,21 +256,44 @@ class VideoProcessor:
     and embedding them as soft subtitles.
     """
 
-    def __init__(self, project_id: Optional[str] = None, chunk_size_seconds: int = 30):
+    def __init__(self, project_id: Optional[str] = None, chunk_size_seconds: int = 30,
+                 batch_chunks: int = 4, debug: bool = False,
+                 enable_llm_retiming: bool = False):
         """
         Initialize the Video Processor.
         
         Args:
             project_id: Google Cloud Project ID
             chunk_size_seconds: Size of audio chunks in seconds to process at a time
+            batch_chunks: Number of audio chunks sent to Gemini in one request
+            debug: Save each chunk's audio and raw Gemini response in the output folder
+            enable_llm_retiming: Ask Gemini to re-time the final captions instead of
+                applying the local timing rules
         """
         self.project_id = project_id
         self.chunk_size_seconds = chunk_size_seconds
+        self.batch_chunks = max(1, batch_chunks)
         self.client = GeminiClient(project_id=project_id)
         
-        # Create temporary directory for processing
-        self.temp_dir = tempfile.TemporaryDirectory()
-        self.temp_path = Path(self.temp_dir.name)
+        # Number of audio chunks transcribed concurrently (Gemini calls are I/O bound)
+        self.max_workers = int(os.environ.get("GEMINI_CONCURRENCY", "8"))
+        
+        # Caps the Gemini requests in flight across transcription and gap analysis
+        self._request_slots = threading.BoundedSemaphore(self.max_workers)
+        
+        # Read buffers for audio cut by ffmpeg through a pipe, bucketed by the size of the audio cut
+        self._chunk_buffers = _BufferPool(chunk_size_seconds * MP3_BYTES_PER_SECOND, self.max_workers)
+        self._gap_buffers = _BufferPool(5 * MP3_BYTES_PER_SECOND, self.max_workers)
+        
+        # Keep per-chunk audio and raw responses in the output folder for debugging
+        # (audio chunks are otherwise only ever held in memory)
+        self.debug = debug or bool(os.environ.get("DEBUG_SAVE_CHUNKS"))
+        
+        self.enable_llm_retiming = enable_llm_retiming
+        
+        # Transcriptions are cached by audio content, so re-processing a video is free
+        self.cache_dir = os.environ.get("CAPTION_CACHE_DIR", os.path.join("output", "cache"))
+        os.makedirs(self.cache_dir, exist_ok=True)
         
         # Supported output formats
         self.output_formats = ["srt", "vtt"]
@@ -69,21 +304,17 @@ class VideoProcessor:
         
         # Token usage tracking
         self.token_usage = {
-            'transcription': {'prompt': 0, 'completion': 0, 'total': 0, 'chunks': 0},
+            'transcription': {'prompt': 0, 'completion': 0, 'total': 0, 'chunks': 0, 'requests': 0},
             'gap_analysis': {'prompt': 0, 'completion': 0, 'total': 0, 'gaps': 0},
-            'timing_optimization': {'prompt': 0, 'completion': 0, 'total': 0},
+            'timing_optimization': {'prompt': 0, 'completion': 0, 'total': 0, 'requests': 0},
             'total': {'prompt': 0, 'completion': 0, 'total': 0}
         }
+        self._usage_lock = threading.Lock()
         
         # Check if ffmpeg is installed
-        if not which("ffmpeg"):
+        if not FFMPEG_BIN or not FFPROBE_BIN:
             raise RuntimeError("ffmpeg is not installed. Please install ffmpeg to use this script.")
 
-    def __del__(self):
-        """Clean up temporary directory on deletion."""
-        if hasattr(self, 'temp_dir'):
-            self.temp_dir.cleanup()
-
     def process_video(self, input_source: str, output_dir: str = None, 
                      output_format: str = "srt", skip_captions: bool = False,
                      skip_embedding: bool = False) -> Dict[str, str]:
@@ -104,10 +335,10 @@ class VideoProcessor:
             raise ValueError(f"Unsupported output format: {output_format}. Use one of {self.output_formats}")
         
         # Determine if input is a YouTube URL or local file
-        if self._is_youtube_url(input_source):
+        is_youtube, video_id = self._parse_source(input_source)
+        if is_youtube:
             print(f"Processing YouTube video: {input_source}")
-            # Extract video ID for naming the output folder
-            video_id = self._extract_youtube_id(input_source)
+            # Use the video ID for naming the output folder
             output_subfolder = f"youtube_{video_id}"
         else:
             print(f"Processing local video file: {input_source}")
@@ -130,9 +361,13 @@ class VideoProcessor:
         result_files = {}
         
         # Step 1: Get video - either download or use local file
-        if self._is_youtube_url(input_source):
+        video_download = None
+        if is_youtube:
             video_path = os.path.join(self.output_dir, "video.mp4")
-            self._download_youtube_video(input_source, video_path)
+            if not skip_embedding:
+                # Captions only need the audio, which is streamed separately below,
+                # so the full video is only downloaded (in the background) for embedding
+                video_download = self._start_youtube_download(input_source, video_path)
         else:
             # For local files, copy to output directory to keep everything together
             video_basename = os.path.basename(input_source)
@@ -141,55 +376,72 @@ class VideoProcessor:
             # Only copy if the source and destination are different
             if os.path.abspath(input_source) != os.path.abspath(video_path):
                 print(f"Copying video file to output directory...")
-                with open(input_source, 'rb') as src_file, open(video_path, 'wb') as dst_file:
-                    dst_file.write(src_file.read())
-        
-        result_files['video'] = video_path
+                if os.path.exists(video_path):
+                    os.remove(video_path)
+                try:
+                    # A hard link shares the data when both are on the same filesystem
+                    os.link(input_source, video_path)
+                except OSError:
+                    # Otherwise let the kernel copy it (copy_file_range/sendfile)
+                    copyfile(input_source, video_path)
         
-        # Step 2: Generate captions if not skipped
-        caption_path = os.path.join(self.output_dir, f"captions.{output_format}")
-        
-        if not skip_captions:
-            print("Generating captions...")
-            # Extract audio from video
-            audio_path = self._extract_audio(video_path)
-            
-            # Process audio in chunks
-            print("Extracting audio and processing with Gemini...")
-            transcript_segments = self._process_audio_chunks(audio_path)
-            
-            # Format captions
-            print(f"Formatting captions as {output_format}...")
-            caption_text = self._format_captions(transcript_segments, output_format)
-            
-            # Save captions to file
-            with open(caption_path, 'w', encoding='utf-8') as f:
-                f.write(caption_text)
+        try:
+            # Step 2: Generate captions if not skipped
+            caption_path = os.path.join(self.output_dir, f"captions.{output_format}")
+            
+            if not skip_captions:
+                print("Generating captions...")
+                if is_youtube:
+                    # Pipe the YouTube audio stream straight into the audio encoder
+                    audio_path = self._download_youtube_audio(input_source)
+                else:
+                    # Extract audio from video
+                    audio_path = self._extract_audio(video_path)
+            
+                # Process audio in chunks
+                print("Extracting audio and processing with Gemini...")
+                transcript_segments = self._process_audio_chunks(audio_path)
+            
+                # Format captions straight into the caption file
+                print(f"Formatting captions as {output_format}...")
+                with open(caption_path, 'w', encoding='utf-8', buffering=1 << 16) as f:
+                    self._format_captions(transcript_segments, output_format, f)
                 
-            print(f"Captions saved to: {caption_path}")
-        else:
-            print("Skipping caption generation...")
-            # Verify caption file exists if skipping generation
-            if not os.path.exists(caption_path):
-                raise FileNotFoundError(f"Caption file not found: {caption_path}. Cannot skip caption generation.")
-        
-        result_files['captions'] = caption_path
-        
-        # Step 3: Embed captions as soft subtitles if not skipped
-        if not skip_embedding:
-            print("Embedding captions into video...")
-            
-            # Only SRT format is supported for embedding
-            if output_format.lower() != "srt":
-                print(f"Warning: Only SRT format is supported for subtitle embedding. Converting to SRT...")
-                # You might want to add format conversion here in the future
+                print(f"Captions saved to: {caption_path}")
+            else:
+                print("Skipping caption generation...")
+                # Verify caption file exists if skipping generation
+                if not os.path.exists(caption_path):
+                    raise FileNotFoundError(f"Caption file not found: {caption_path}. Cannot skip caption generation.")
+            
+            result_files['captions'] = caption_path
+            
+            if video_download:
+                # Raises if the background download failed
+                self._finish_youtube_download(video_download, input_source, video_path)
+            if os.path.exists(video_path):
+                result_files['video'] = video_path
+            
+            # Step 3: Embed captions as soft subtitles if not skipped
+            if not skip_embedding:
+                print("Embedding captions into video...")
+            
+                # Only SRT format is supported for embedding
+                if output_format.lower() != "srt":
+                    print(f"Warning: Only SRT format is supported for subtitle embedding. Converting to SRT...")
+                    # You might want to add format conversion here in the future
                 
-            output_video_path = os.path.join(self.output_dir, "video_with_captions.mp4")
-            self._add_soft_subtitles(video_path, caption_path, output_video_path)
+                output_video_path = os.path.join(self.output_dir, "video_with_captions.mp4")
+                self._add_soft_subtitles(video_path, [caption_path], output_video_path)
             
-            result_files['video_with_captions'] = output_video_path
-        else:
-            print("Skipping caption embedding...")
+                result_files['video_with_captions'] = output_video_path
+            else:
+                print("Skipping caption embedding...")
+        finally:
+            # Don't leave the background download running if processing failed
+            if video_download and video_download.poll() is None:
+                video_download.kill()
+                video_download.wait()
         
         # Save token usage data to a JSON file
         if not skip_captions:
@@ -230,164 +482,353 @@ class VideoProcessor:
             
         # Add total API calls
         summary['total_api_calls'] = (
-            summary['transcription']['chunks'] + 
+            summary['transcription']['requests'] + 
             summary['gap_analysis']['gaps'] + 
-            1  # timing optimization
+            summary['timing_optimization']['requests']
         )
         
         return summary
 
-    def _extract_youtube_id(self, url: str) -> str:
-        """Extract the YouTube video ID from a URL."""
-        parsed = urlparse(url)
-        if parsed.netloc == 'youtu.be':
-            return parsed.path.lstrip('/')
-        elif parsed.netloc in ('youtube.com', 'www.youtube.com'):
-            if 'v=' in parsed.query:
-                return parsed.query.split('v=')[1].split('&')[0]
-        # If extraction fails, return a generic name
-        return "video"
-
-    def _is_youtube_url(self, url: str) -> bool:
-        """Check if the input is a YouTube URL."""
-        parsed = urlparse(url)
-        return (
-            parsed.netloc in ('youtube.com', 'www.youtube.com', 'youtu.be') and 
-            parsed.scheme in ('http', 'https')
-        )
+    def _record_token_usage(self, phase: str, token_count: TokenCount, **counters: int):
+        """
+        Add the tokens of one API call to the usage statistics.
+        
+        Args:
+            phase: Key of the phase in self.token_usage
+            token_count: Token count returned by the Gemini client
+            **counters: Per-phase counters to increment (e.g. chunks=4, requests=1)
+        """
+        # Chunks are processed from worker threads, so guard the shared counters
+        with self._usage_lock:
+            usage = self.token_usage[phase]
+            usage['prompt'] += token_count.prompt_tokens
+            usage['completion'] += token_count.completion_tokens
+            usage['total'] += token_count.total_tokens
+            for counter, count in counters.items():
+                usage[counter] += count
+            
+            self.token_usage['total']['prompt'] += token_count.prompt_tokens
+            self.token_usage['total']['completion'] += token_count.completion_tokens
+            self.token_usage['total']['total'] += token_count.total_tokens
 
-    def _download_youtube_video(self, youtube_url: str, output_path: str) -> str:
+    def _parse_source(self, input_source: str) -> Tuple[bool, Optional[str]]:
         """
-        Download a YouTube video and save to the specified path.
+        Check whether the input is a YouTube URL and extract the video ID in one match.
+        
+        Args:
+            input_source: YouTube URL or path to a video file
+            
+        Returns:
+            Tuple of (is_youtube, video_id); video_id is None for local files
+        """
+        match = YOUTUBE_URL_RE.match(input_source)
+        if match:
+            return True, match.group(1)
+        return False, None
+
+    def _start_youtube_download(self, youtube_url: str, output_path: str) -> subprocess.Popen:
+        """
+        Start downloading a YouTube video in the background.
+        
+        The download runs in its own yt-dlp process, so it can be stopped if
+        processing fails before the video is needed.
         
         Args:
             youtube_url: URL of the YouTube video
             output_path: Path where the video will be saved
             
         Returns:
-            Path to the downloaded video file
+            The running yt-dlp process; pass it to _finish_youtube_download
         """
         print(f"Downloading YouTube video: {youtube_url}")
         print(f"This may take a while depending on the video size...")
         
-        ydl_opts = {
-            'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
-            'outtmpl': output_path,
-            'quiet': False,
-            'no_warnings': True,
-        }
+        cmd = [
+            sys.executable, "-m", "yt_dlp",
+            "-f", "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best",
+            "--no-warnings",
+            "--concurrent-fragments", "8",  # Fetch DASH fragments in parallel
+            "--http-chunk-size", "10M",  # Ranged requests avoid per-connection throttling
+            "-o", output_path,
+            youtube_url
+        ]
+        return subprocess.Popen(cmd)
+
+    def _finish_youtube_download(self, downloader: subprocess.Popen, youtube_url: str, output_path: str) -> str:
+        """
+        Wait for a download started by _start_youtube_download.
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([youtube_url])
+        Args:
+            downloader: The yt-dlp process
+            youtube_url: URL of the YouTube video
+            output_path: Path where the video is saved
             
-        if not os.path.exists(output_path):
+        Returns:
+            Path to the downloaded video file
+        """
+        if downloader.wait() != 0 or not os.path.exists(output_path):
             raise RuntimeError(f"Failed to download YouTube video: {youtube_url}")
             
         print(f"Successfully downloaded video to: {output_path}")
         return output_path
 
-    def _extract_audio(self, video_path: str) -> str:
+    def _download_youtube_audio(self, youtube_url: str) -> str:
+        """
+        Download only the audio of a YouTube video, encoding it while it streams in.
+        
+        yt-dlp writes the audio stream to stdout and ffmpeg reads it from stdin,
+        so nothing but the encoded audio file is written to disk.
+        
+        Args:
+            youtube_url: URL of the YouTube video
+            
+        Returns:
+            Path to the extracted audio file
+        """
+        print(f"Streaming audio from YouTube: {youtube_url}")
+        
+        cmd = [
+            sys.executable, "-m", "yt_dlp",
+            "-f", "bestaudio[ext=webm]/bestaudio/best",  # WebM can be demuxed from a pipe
+            "--quiet",
+            "--no-warnings",
+            "--http-chunk-size", "10M",  # Ranged requests avoid per-connection throttling
+            "-o", "-",  # Write the stream to stdout
+            youtube_url
+        ]
+        downloader = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+        try:
+            audio_path = self._extract_audio("pipe:0", stdin=downloader.stdout)
+        except RuntimeError:
+            # A failed download leaves ffmpeg without input, so report that instead
+            downloader.stdout.close()
+            if downloader.wait() != 0:
+                raise RuntimeError(f"Failed to download YouTube audio: {youtube_url}")
+            raise
+        finally:
+            downloader.stdout.close()
+            downloader.wait()
+        
+        if downloader.returncode != 0:
+            raise RuntimeError(f"Failed to download YouTube audio: {youtube_url}")
+        return audio_path
+
+    def _extract_audio(self, video_path: str, stdin=None) -> str:
         """
         Extract audio from a video file.
         
         Args:
-            video_path: Path to the video file
+            video_path: Path to the video file, or "pipe:0" to read it from stdin
+            stdin: File object the media is read from when video_path is "pipe:0"
             
         Returns:
             Path to the extracted audio file
         """
         audio_path = os.path.join(self.output_dir, "audio.mp3")
         
-        # Use moviepy to extract audio
-        with VideoFileClip(video_path) as video:
-            video.audio.write_audiofile(audio_path, 
-                                       codec='mp3', 
-                                       ffmpeg_params=["-ac", "1", "-ar", "44100"],
-                                       verbose=False, 
-                                       logger=None)
+        # Let ffmpeg demux and encode the audio track directly; 16 kHz mono is
+        # plenty for speech recognition and keeps the uploaded chunks small
+        cmd = [
+            FFMPEG_BIN,
+            "-i", video_path,
+            "-vn",  # Drop the video stream
+            "-ac", "1",  # Mono
+            "-ar", str(AUDIO_SAMPLE_RATE),
+            "-c:a", "libmp3lame",
+            "-q:a", "5",
+            "-nostats",
+            "-loglevel", "error",  # Only log what's needed to report a failure
+            "-y",  # Overwrite output file if it exists
+            audio_path
+        ]
+        
+        try:
+            _run_ffmpeg(cmd, stdin=stdin)
+        except subprocess.CalledProcessError as e:
+            print(f"Error extracting audio: {e}")
+            print(f"ffmpeg stderr: {e.stderr}")
+            raise RuntimeError("Failed to extract audio from video. Does the video have an audio track?")
             
         return audio_path
 
-    def _detect_and_fill_gaps(self, audio: AudioSegment, segments: List[Dict[str, any]], 
+    def _decode_pcm(self, audio_path: str, output_dir: str) -> np.ndarray:
+        """
+        Decode an audio file once to raw 16-bit mono PCM for loudness analysis.
+        
+        The samples are written to a file and memory-mapped, so slicing a time
+        range is a zero-copy view and long videos are not held in memory.
+        
+        Args:
+            audio_path: Path to the audio file
+            output_dir: Scratch directory for the PCM file (removed by the caller)
+            
+        Returns:
+            Array of int16 samples at AUDIO_SAMPLE_RATE
+        """
+        pcm_path = os.path.join(output_dir, "audio.pcm")
+        cmd = [
+            FFMPEG_BIN,
+            "-i", audio_path,
+            "-ac", "1",
+            "-ar", str(AUDIO_SAMPLE_RATE),
+            "-f", "s16le",  # Raw little-endian 16-bit samples
+            "-y",
+            pcm_path
+        ]
+        _run_ffmpeg(cmd)
+        
+        if os.path.getsize(pcm_path) == 0:
+            return np.zeros(0, dtype=np.int16)
+        return np.memmap(pcm_path, dtype="<i2", mode="r")
+
+    def _probe_duration(self, media_path: str) -> float:
+        """
+        Get the duration of a media file without decoding it.
+        
+        Args:
+            media_path: Path to the audio or video file
+            
+        Returns:
+            Duration in seconds
+        """
+        cmd = [
+            FFPROBE_BIN,
+            "-v", "error",
+            "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1",
+            media_path
+        ]
+        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        return float(result.stdout.strip())
+
+    def _slice_audio(self, audio_path: str, start_ms: int, end_ms: int, buffers: _BufferPool) -> bytes:
+        """
+        Cut a time range out of an audio file without re-encoding it.
+        
+        Args:
+            audio_path: Path to the source audio file
+            start_ms: Start of the range in milliseconds
+            end_ms: End of the range in milliseconds
+            buffers: Pool of buffers to read the ffmpeg output into
+            
+        Returns:
+            MP3 bytes of the audio slice
+        """
+        cmd = [
+            FFMPEG_BIN,
+            "-ss", f"{start_ms / 1000.0:.3f}",  # Seek on the input side (fast)
+            "-t", f"{(end_ms - start_ms) / 1000.0:.3f}",
+            "-i", audio_path,
+            "-c", "copy",  # Copy MP3 frames as-is (no re-encoding)
+            "-f", "mp3",
+            "pipe:1"  # Write to stdout instead of a file
+        ]
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as process:
+            audio_bytes = buffers.read_all(process.stdout)
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd)
+        return audio_bytes
+
+    def _split_audio(self, audio_path: str, chunk_size_ms: int, output_dir: str, log_file) -> subprocess.Popen:
+        """
+        Start splitting an audio file into fixed-length chunks with a single ffmpeg run.
+        
+        The chunks are stream-copied by ffmpeg's segment muxer and written as
+        segment_00000.mp3, segment_00001.mp3, ... in time order. ffmpeg prints
+        the name of each chunk file to stdout once the file is complete, so
+        chunks can be used while the rest are still being cut.
+        
+        Args:
+            audio_path: Path to the source audio file
+            chunk_size_ms: Length of each chunk in milliseconds
+            output_dir: Directory for the chunk files
+            log_file: Binary file that receives ffmpeg's log, for error reporting
+            
+        Returns:
+            The running ffmpeg process
+        """
+        cmd = [
+            FFMPEG_BIN,
+            "-i", audio_path,
+            "-map", "0:a",
+            "-c", "copy",  # Copy MP3 frames as-is (no re-encoding)
+            "-f", "segment",
+            "-segment_time", f"{chunk_size_ms / 1000.0:.3f}",
+            "-segment_format", "mp3",
+            "-segment_list", "pipe:1",
+            "-segment_list_type", "flat",
+            "-y",
+            os.path.join(output_dir, "segment_%05d.mp3")
+        ]
+        return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=log_file, text=True)
+
+    def _detect_and_fill_gaps(self, audio_path: str, pcm: np.ndarray, segments: List[Dict[str, any]], 
                              start_time: float, end_time: float) -> List[Dict[str, any]]:
         """
         Detect and fill gaps between transcript segments.
         
         Args:
-            audio: Full audio segment
+            audio_path: Path to the audio file, for cutting out gaps sent to Gemini
+            pcm: PCM samples of the entire audio, indexed by absolute time
             segments: List of transcript segments for the current chunk
             start_time: Start time of current chunk in seconds
             end_time: End time of current chunk in seconds
             
         Returns:
-            List of transcript segments with gaps filled
+            List of transcript segments with gaps filled, in time order
         """
-        # Sort segments by start time
-        sorted_segments = sorted(segments, key=lambda x: x["start"])
-        
         # No segments to process
-        if not sorted_segments:
+        if not segments:
             return []
-            
-        filled_segments = []
+        
+        # Gemini usually returns segments in order, but nothing guarantees it
+        segments = sorted(segments, key=itemgetter("start"))
+        
+        # Lay out the segments in order, with a (gap_start, gap_end) placeholder
+        # wherever there is a gap > 1 second before, between or after them
+        timeline = []
         current_time = start_time
+        for segment in segments:
+            if segment["start"] - current_time > 1.0:
+                timeline.append((current_time, segment["start"]))
+            timeline.append(segment)
+            current_time = segment["end"]
         
-        # Check for gap at the beginning of the chunk
-        if sorted_segments[0]["start"] - start_time > 1.0:  # Gap > 1 second
-            # Extract audio for this gap
-            gap_start_ms = int(start_time * 1000)
-            gap_end_ms = int(sorted_segments[0]["start"] * 1000)
-            gap_audio = audio[gap_start_ms - int(start_time * 1000):gap_end_ms - int(start_time * 1000)]
-            
-            # Analyze gap
-            gap_segment = self._analyze_audio_gap(gap_audio, start_time, sorted_segments[0]["start"])
-            if gap_segment:
-                filled_segments.append(gap_segment)
-        
-        # Add first segment
-        filled_segments.append(sorted_segments[0])
-        current_time = sorted_segments[0]["end"]
-        
-        # Process remaining segments and check for gaps between them
-        for i in range(1, len(sorted_segments)):
-            current_segment = sorted_segments[i]
-            
-            # Check if there's a significant gap between segments
-            if current_segment["start"] - current_time > 1.0:  # Gap > 1 second
-                # Extract audio for this gap
-                gap_start_ms = int(current_time * 1000)
-                gap_end_ms = int(current_segment["start"] * 1000)
-                gap_audio = audio[gap_start_ms - int(start_time * 1000):gap_end_ms - int(start_time * 1000)]
-                
-                # Analyze gap
-                gap_segment = self._analyze_audio_gap(gap_audio, current_time, current_segment["start"])
-                if gap_segment:
-                    filled_segments.append(gap_segment)
-            
-            # Add current segment
-            filled_segments.append(current_segment)
-            current_time = current_segment["end"]
-        
-        # Check for gap at the end of the chunk
-        if end_time - current_time > 1.0:  # Gap > 1 second
-            # Extract audio for this gap
-            gap_start_ms = int(current_time * 1000)
-            gap_end_ms = int(end_time * 1000)
-            gap_audio = audio[gap_start_ms - int(start_time * 1000):gap_end_ms - int(start_time * 1000)]
-            
-            # Analyze gap
-            gap_segment = self._analyze_audio_gap(gap_audio, current_time, end_time)
-            if gap_segment:
-                filled_segments.append(gap_segment)
+        if end_time - current_time > 1.0:
+            timeline.append((current_time, end_time))
+        
+        gaps = [item for item in timeline if isinstance(item, tuple)]
+        
+        def analyze_gap(gap: Tuple[float, float]) -> Optional[Dict[str, any]]:
+            # View the samples of this gap
+            gap_start, gap_end = gap
+            gap_pcm = pcm[int(gap_start * AUDIO_SAMPLE_RATE):int(gap_end * AUDIO_SAMPLE_RATE)]
+            return self._analyze_audio_gap(audio_path, gap_pcm, gap_start, gap_end)
+        
+        # Analyze the gaps concurrently; each may need its own Gemini round-trip
+        gap_segments = {}
+        if gaps:
+            with ThreadPoolExecutor(max_workers=min(len(gaps), self.max_workers)) as executor:
+                gap_segments = dict(zip(gaps, executor.map(analyze_gap, gaps)))
+        
+        filled_segments = []
+        for item in timeline:
+            if isinstance(item, tuple):
+                item = gap_segments[item]
+                if item is None:
+                    continue
+            filled_segments.append(item)
         
         return filled_segments
     
-    def _analyze_audio_gap(self, gap_audio: AudioSegment, start_time: float, end_time: float) -> Dict[str, any]:
+    def _analyze_audio_gap(self, audio_path: str, gap_pcm: np.ndarray,
+                           start_time: float, end_time: float) -> Dict[str, any]:
         """
         Analyze audio gap to determine if it contains important audio cues.
         
         Args:
-            gap_audio: Audio segment for the gap
+            audio_path: Path to the audio file the gap is cut from
+            gap_pcm: PCM samples of the gap
             start_time: Start time of the gap in seconds
             end_time: End time of the gap in seconds
             
@@ -396,17 +837,24 @@ class VideoProcessor:
         """
         # Check if the gap is mostly silence
         silence_threshold = -50  # dB
-        is_silence = gap_audio.dBFS < silence_threshold
+        gap_dbfs = _dbfs(gap_pcm)
+        is_silence = gap_dbfs < silence_threshold
+        
+        # Long stretches of near-total silence don't need Gemini to describe them
+        if gap_dbfs < SILENT_AUDIO_DBFS and end_time - start_time > 3.0:
+            return {
+                "text": "[Silence]",
+                "start": start_time,
+                "end": end_time,
+                "type": "silence"
+            }
         
         # If it's meaningful silence or has significant audio, create a gap segment
         if not is_silence or end_time - start_time > 3.0:  # If not silence or gap > 3 seconds
-            # Export gap audio to a temp file for analysis
-            gap_path = self.temp_path / f"gap_{start_time:.2f}.mp3"
-            gap_audio.export(str(gap_path), format="mp3", parameters=["-ac", "1", "-ar", "44100"])
-            
-            # Get audio bytes
-            with open(gap_path, "rb") as audio_file:
-                audio_bytes = audio_file.read()
+            # Cut the gap out of the MP3 in memory for analysis (no re-encoding)
+            audio_bytes = self._slice_audio(
+                audio_path, int(start_time * 1000), int(end_time * 1000), self._gap_buffers
+            )
             
             try:
                 # Create prompt for gap analysis
@@ -449,22 +897,15 @@ class VideoProcessor:
                 
                 # Process with Gemini and track tokens
                 print(f"Analyzing audio gap at {start_time:.2f}s - {end_time:.2f}s...")
-                response, token_count = self.client.generate_content(
-                    contents=contents,
-                    model="gemini-2.0-flash-001",
-                    count_tokens=True
-                )
+                with self._request_slots:
+                    response, token_count = self.client.generate_content(
+                        contents=contents,
+                        model="gemini-2.0-flash-001",
+                        count_tokens=True
+                    )
                 
                 # Update token usage statistics
-                self.token_usage['gap_analysis']['prompt'] += token_count.prompt_tokens
-                self.token_usage['gap_analysis']['completion'] += token_count.completion_tokens
-                self.token_usage['gap_analysis']['total'] += token_count.total_tokens
-                self.token_usage['gap_analysis']['gaps'] += 1
-                
-                # Update total token usage
-                self.token_usage['total']['prompt'] += token_count.prompt_tokens
-                self.token_usage['total']['completion'] += token_count.completion_tokens
-                self.token_usage['total']['total'] += token_count.total_tokens
+                self._record_token_usage('gap_analysis', token_count, gaps=1)
                 
                 # Parse response
                 response_text = response if isinstance(response, str) else response.text if hasattr(response, 'text') else str(response)
@@ -497,6 +938,11 @@ class VideoProcessor:
         """
         Perform a final adjustment of caption timing for optimal viewing experience.
         
+        Adjacent speech captions separated by a short pause are merged, every
+        caption is held on screen between CAPTION_MIN_DURATION and
+        CAPTION_MAX_DURATION seconds, and captions are trimmed so they end
+        before the next one starts.
+        
         Args:
             transcript_segments: List of transcript segments with timing information
             
@@ -508,16 +954,61 @@ class VideoProcessor:
             
         print("Performing final timing optimization...")
         
-        # Sort segments by start time
-        sorted_segments = sorted(transcript_segments, key=lambda x: x["start"])
+        # Sort in place; the transcribed chunks are already in order, so Timsort
+        # only has to merge in the silent chunks
+        transcript_segments.sort(key=itemgetter("start"))
+        
+        if self.enable_llm_retiming:
+            return self._retime_with_gemini(transcript_segments)
+        
+        # Merge speech captions split by a short pause, as long as the result stays readable
+        merged = []
+        for seg in transcript_segments:
+            seg = dict(seg, type=seg.get("type", "speech"))
+            if merged:
+                prev = merged[-1]
+                if (prev["type"] == seg["type"] == "speech"
+                        and seg["start"] - prev["end"] < CAPTION_MERGE_GAP
+                        and seg["end"] - prev["start"] <= CAPTION_MAX_DURATION):
+                    prev["text"] = f"{prev['text']} {seg['text']}"
+                    prev["end"] = max(prev["end"], seg["end"])
+                    continue
+            merged.append(seg)
+        
+        for i, seg in enumerate(merged):
+            # Clamp the duration
+            duration = min(max(seg["end"] - seg["start"], CAPTION_MIN_DURATION), CAPTION_MAX_DURATION)
+            end = seg["start"] + duration
+            
+            # Finish before the next caption starts
+            if i + 1 < len(merged):
+                next_start = merged[i + 1]["start"]
+                if next_start - CAPTION_SPACING > seg["start"]:
+                    end = min(end, next_start - CAPTION_SPACING)
+                else:
+                    end = min(end, next_start)
+            seg["end"] = round(end, 3)
+        
+        print(f"Optimized timing for {len(merged)} caption segments")
+        return merged
+    
+    def _retime_with_gemini(self, sorted_segments: List[Dict[str, any]]) -> List[Dict[str, any]]:
+        """
+        Ask Gemini to re-time the caption segments.
         
-        # Prepare a description of each segment for the API
-        segments_json = json.dumps([{
+        Args:
+            sorted_segments: Transcript segments sorted by start time
+            
+        Returns:
+            List of transcript segments with optimized timing, or the input on failure
+        """
+        # Prepare a description of each segment for the API (compact, to save prompt tokens)
+        segments_json = orjson.dumps([{
             "text": seg["text"],
             "start": seg["start"],
             "end": seg["end"],
             "type": seg.get("type", "speech")
-        } for seg in sorted_segments], indent=2)
+        } for seg in sorted_segments]).decode()
         
         # Create prompt for the final timing adjustment
         prompt = f"""
@@ -552,18 +1043,12 @@ class VideoProcessor:
                 contents=contents,
                 model="gemini-2.0-flash-001",
                 return_json=True,
+                json_schema=SEGMENT_LIST_SCHEMA,
                 count_tokens=True
             )
             
             # Update token usage statistics
-            self.token_usage['timing_optimization']['prompt'] = token_count.prompt_tokens
-            self.token_usage['timing_optimization']['completion'] = token_count.completion_tokens
-            self.token_usage['timing_optimization']['total'] = token_count.total_tokens
-            
-            # Update total token usage
-            self.token_usage['total']['prompt'] += token_count.prompt_tokens
-            self.token_usage['total']['completion'] += token_count.completion_tokens
-            self.token_usage['total']['total'] += token_count.total_tokens
+            self._record_token_usage('timing_optimization', token_count, requests=1)
             
             # Parse the response
             if isinstance(response, str):
@@ -599,304 +1084,556 @@ class VideoProcessor:
         Returns:
             List of transcript segments with timing information
         """
-        # Load audio file
-        audio = AudioSegment.from_file(audio_path)
-        duration_ms = len(audio)
+        # Probe the duration instead of decoding the whole file into memory
+        duration_ms = int(self._probe_duration(audio_path) * 1000)
+        
         chunk_size_ms = self.chunk_size_seconds * 1000
+        samples_per_ms = AUDIO_SAMPLE_RATE // 1000
+        
+        def process_batch(batch: List[Tuple[int, int]]) -> List[Dict[str, any]]:
+            chunks = []
+            for start_ms, end_ms in batch:
+                segment_path = os.path.join(split_dir, f"segment_{start_ms // chunk_size_ms:05d}.mp3")
+                if os.path.exists(segment_path):
+                    # A regular file knows its size, so one read allocates exactly once
+                    with open(segment_path, "rb") as segment_file:
+                        audio_bytes = segment_file.read()
+                else:
+                    # The segment muxer cuts on frame boundaries, so a very short
+                    # tail may not get its own file; cut it out directly
+                    audio_bytes = self._slice_audio(audio_path, start_ms, end_ms, self._chunk_buffers)
+                chunks.append((audio_bytes, start_ms / 1000.0, (end_ms - start_ms) / 1000.0))
+            
+            # Process the chunks with Gemini
+            batch_transcripts = self._transcribe_audio_batch(chunks)
+            
+            filled_segments = []
+            for (audio_bytes, start_sec, duration_sec), segment_transcript in zip(chunks, batch_transcripts):
+                end_sec = start_sec + duration_sec
+                
+                # Detect and fill gaps between segments
+                filled_segments.extend(
+                    self._detect_and_fill_gaps(audio_path, pcm, segment_transcript, start_sec, end_sec)
+                )
+                
+                print(f"Processed audio segment {start_sec:.2f}s - {end_sec:.2f}s")
+            return filled_segments
         
+        silent_segments = []
         transcript_segments = []
-        
-        # Process audio in chunks
-        for start_ms in range(0, duration_ms, chunk_size_ms):
-            end_ms = min(start_ms + chunk_size_ms, duration_ms)
-            chunk = audio[start_ms:end_ms]
-            
-            # Convert timing to seconds for captions
-            start_sec = start_ms / 1000.0
-            end_sec = end_ms / 1000.0
-            
-            # Process chunk with Gemini
-            segment_transcript = self._transcribe_audio_chunk(chunk, start_sec)
-            
-            # Detect and fill gaps between segments
-            filled_transcript = self._detect_and_fill_gaps(chunk, segment_transcript, start_sec, end_sec)
-            transcript_segments.extend(filled_transcript)
-            
-            print(f"Processed audio segment {start_sec:.2f}s - {end_sec:.2f}s")
+        with tempfile.TemporaryDirectory() as split_dir, tempfile.TemporaryFile() as split_log:
+            # Cut all chunks with one ffmpeg process instead of one per chunk. It
+            # runs in the background while the PCM is decoded and the first
+            # batches are transcribed
+            with self._split_audio(audio_path, chunk_size_ms, split_dir, split_log) as splitter:
+                try:
+                    # Decode once to memory-mapped PCM; chunks and gaps are views into it
+                    pcm = self._decode_pcm(audio_path, split_dir)
+                    
+                    # Precompute chunk boundaries. Silent chunks are captioned locally; the
+                    # rest are grouped into batches that are sent to Gemini in a single request
+                    chunk_bounds = []
+                    for start_ms in range(0, duration_ms, chunk_size_ms):
+                        end_ms = min(start_ms + chunk_size_ms, duration_ms)
+                        if _dbfs(pcm[start_ms * samples_per_ms:end_ms * samples_per_ms]) < SILENT_AUDIO_DBFS:
+                            print(f"Skipping silent audio segment {start_ms / 1000.0:.2f}s - {end_ms / 1000.0:.2f}s")
+                            silent_segments.append({
+                                "text": "[Silence]",
+                                "start": start_ms / 1000.0,
+                                "end": end_ms / 1000.0,
+                                "type": "silence"
+                            })
+                        else:
+                            chunk_bounds.append((start_ms, end_ms))
+                    
+                    batches = [
+                        chunk_bounds[i:i + self.batch_chunks]
+                        for i in range(0, len(chunk_bounds), self.batch_chunks)
+                    ]
+                    
+                    # Gemini calls are network bound, so threads overlap the round-trips.
+                    # Each batch is submitted as soon as ffmpeg has finished its last chunk
+                    with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                        futures = []
+                        if batches:
+                            for chunks_written, _ in enumerate(splitter.stdout, start=1):
+                                while (len(futures) < len(batches)
+                                       and batches[len(futures)][-1][0] // chunk_size_ms < chunks_written):
+                                    futures.append(executor.submit(process_batch, batches[len(futures)]))
+                            
+                            if splitter.wait() != 0:
+                                split_log.seek(0)
+                                raise _ffmpeg_error(splitter.returncode, splitter.args, split_log)
+                            futures.extend(executor.submit(process_batch, batch) for batch in batches[len(futures):])
+                        
+                        # Collect the results in chunk order
+                        for future in futures:
+                            transcript_segments.extend(future.result())
+                finally:
+                    if splitter.poll() is None:
+                        splitter.kill()
+                    # Close the memory map before its file is removed with split_dir
+                    pcm = None
+        
+        # Silent chunks are put in place by the sort in _finalize_timing
+        transcript_segments.extend(silent_segments)
         
         # Perform final timing optimization on all segments
         optimized_segments = self._finalize_timing(transcript_segments)
             
         return optimized_segments
 
-    def _transcribe_audio_chunk(self, audio_chunk: AudioSegment, start_time: float) -> List[Dict[str, any]]:
+    def _transcription_cache_key(self, audio_bytes: bytes, prompt: str) -> str:
+        """Build the cache key for a transcription from the audio bytes and the prompt."""
+        digest = hashlib.sha256(audio_bytes)
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _load_cached_transcription(self, cache_key: str) -> Optional[List[Dict[str, any]]]:
         """
-        Transcribe an audio chunk using Gemini multimodal capabilities.
+        Load a cached transcription response.
         
         Args:
-            audio_chunk: Audio segment to transcribe
-            start_time: Start time of this chunk in the original audio (seconds)
+            cache_key: Cache key from _transcription_cache_key
             
         Returns:
-            List of transcript segments with timing information
+            The parsed JSON segments (relative to the chunk start), or None on a cache miss
         """
-        # Export chunk to a temporary file
-        chunk_path = self.temp_path / f"chunk_{start_time}.mp3"
-        audio_chunk.export(str(chunk_path), format="mp3", 
-                          parameters=["-ac", "1", "-ar", "44100"])  # Ensure mono audio at 44.1kHz
-        
-        # Save the audio chunk to the output folder
-        output_chunk_path = os.path.join(self.output_dir, f"chunk_{start_time:.2f}.mp3") 
-        audio_chunk.export(output_chunk_path, format="mp3")
-        
-        # Get audio duration
-        duration_sec = len(audio_chunk) / 1000.0
-        
-        # Read audio file as bytes
-        with open(chunk_path, "rb") as audio_file:
-            audio_bytes = audio_file.read()
-        
-        # Create enhanced prompt for Gemini
-        prompt = f"""
-        Please transcribe this audio for captioning TV shows, videocasts, or webnovels, with accurate timestamps.
-        This audio chunk starts at {start_time:.2f} seconds in the original video and is {duration_sec:.2f} seconds long.
-        
-        IMPORTANT: In addition to speech, also identify:
-        - Music: Describe the music style or mood and mark as "[♪ Upbeat jazz music ♪]" or similar
-        - Sound effects: Describe important sounds and mark as "[Sound: door slamming]" or similar
-        - Ambient noise: Note significant background sounds like "[Crowd chattering]"
-        - Silence: If there's silence but contextually important, indicate as "[Silence]" or "[Tense silence]"
+        cache_path = os.path.join(self.cache_dir, f"{cache_key}.json")
+        try:
+            with open(cache_path, "rb") as f:
+                json_data = orjson.loads(f.read())
+        except (OSError, ValueError):
+            return None
+        return json_data if isinstance(json_data, list) else None
+
+    def _store_cached_transcription(self, cache_key: str, json_data: List[Dict[str, any]]):
+        """
+        Save a transcription response to the cache.
         
-        Ensure each caption segment is self-contained and meaningful to viewers. Split long sentences at natural breaks.
+        Args:
+            cache_key: Cache key from _transcription_cache_key
+            json_data: Parsed JSON segments (relative to the chunk start)
+        """
+        cache_path = os.path.join(self.cache_dir, f"{cache_key}.json")
+        tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(orjson.dumps(json_data))
+            # Atomic rename so concurrent readers never see a partial file
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Warning: Could not write transcription cache: {str(e)}")
+
+    def _transcribe_audio_batch(self, chunks: List[Tuple[bytes, float, float]]) -> List[List[Dict[str, any]]]:
+        """
+        Transcribe a batch of audio chunks using Gemini multimodal capabilities.
         
-        Return the result as a JSON array with each chunk containing:
-        1. "text": The transcribed text, including speech AND non-speech elements
-        2. "start": Start time in seconds (relative to the start of this chunk)
-        3. "end": End time in seconds (relative to the start of this chunk)
-        4. "type": "speech" for spoken dialogue, "music" for music, "sound" for sound effects, "silence" for meaningful silence
+        All chunks that are not already cached are sent together, split into as
+        few requests as MAX_REQUEST_AUDIO_BYTES allows.
         
-        Format:
-        [
-            {{"text": "This is the first chunk", "start": 0.0, "end": 2.5, "type": "speech"}},
-            {{"text": "[♪ Upbeat music ♪]", "start": 2.5, "end": 5.0, "type": "music"}},
-            {{"text": "[Sound: door slamming]", "start": 5.0, "end": 5.5, "type": "sound"}},
-            {{"text": "[Tense silence]", "start": 5.5, "end": 8.0, "type": "silence"}}
+        Args:
+            chunks: List of (audio_bytes, start_time, duration_sec) tuples in time order,
+                where start_time is the start of the chunk in the original audio (seconds)
+            
+        Returns:
+            One list of transcript segments per chunk, with timing relative to the entire video
+        """
+        # Save a copy of the audio chunks to the output folder
+        if self.debug:
+            for audio_bytes, start_time, _ in chunks:
+                output_chunk_path = os.path.join(self.output_dir, f"{self._chunk_stem(start_time)}.mp3")
+                with open(output_chunk_path, "wb") as f:
+                    f.write(audio_bytes)
+        
+        batch_segments = [None] * len(chunks)
+        
+        # Reuse earlier transcriptions of the exact same audio and prompt
+        cache_keys = [
+            self._transcription_cache_key(audio_bytes, TRANSCRIPTION_PROMPT)
+            for audio_bytes, _, _ in chunks
         ]
-        
-        For audio content you can't understand clearly, mark it as "[unintelligible]".
-        Make sure the timestamps are accurate and reflect the actual timing of speech and sounds.
+        pending = []
+        for i, cache_key in enumerate(cache_keys):
+            json_data = self._load_cached_transcription(cache_key)
+            if json_data is None:
+                pending.append(i)
+                continue
+            
+            _, start_time, duration_sec = chunks[i]
+            try:
+                batch_segments[i] = self._to_video_segments(json_data, start_time, duration_sec)
+            except (TypeError, ValueError):
+                # An unusable cache entry is treated as a miss and overwritten
+                pending.append(i)
+                continue
+            print(f"Using cached transcription for audio chunk at {start_time:.2f}s")
+        
+        # Group the uncached chunks into requests that stay under the payload limit
+        groups = []
+        group_bytes = 0
+        for i in pending:
+            size = len(chunks[i][0])
+            if not groups or group_bytes + size > MAX_REQUEST_AUDIO_BYTES:
+                groups.append([])
+                group_bytes = 0
+            groups[-1].append(i)
+            group_bytes += size
+        
+        for group in groups:
+            self._transcribe_uncached(chunks, group, cache_keys, batch_segments)
+        
+        return batch_segments
+
+    def _transcribe_uncached(self, chunks: List[Tuple[bytes, float, float]], pending: List[int],
+                             cache_keys: List[str], batch_segments: List[List[Dict[str, any]]]):
         """
+        Transcribe the given chunks of a batch in one request and cache the results.
         
-        # Calculate default segment duration for fallback cases
-        segment_duration = 5.0  # seconds
-        num_segments = max(1, int(duration_sec / segment_duration))
+        Args:
+            chunks: All chunks of the batch, as passed to _transcribe_audio_batch
+            pending: Indices of the chunks to transcribe
+            cache_keys: Cache key of every chunk in the batch
+            batch_segments: Per-chunk results of the batch, filled in for the pending chunks
+        """
+        pending_chunks = [chunks[i] for i in pending]
+        first_start = pending_chunks[0][1]
         
         try:
-            # Create content with both audio and text parts using the proper Blob structure
-            contents = [
-                types.Content(
-                    role="user",
-                    parts=[
-                        types.Part(
-                            inline_data=types.Blob(
-                                mime_type="audio/mp3",
-                                data=audio_bytes
-                            )
-                        ),
-                        types.Part(text=prompt)
-                    ]
-                )
-            ]
-            
-            print(f"Processing audio chunk at {start_time:.2f}s with Gemini multimodal...")
-            
-            # Process with Gemini using the model that supports multimodal input and track tokens
-            response, token_count = self.client.generate_content(
-                contents=contents,
-                model="gemini-2.0-flash-001",
-                count_tokens=True
-            )
-            
-            # Update token usage statistics
-            self.token_usage['transcription']['prompt'] += token_count.prompt_tokens
-            self.token_usage['transcription']['completion'] += token_count.completion_tokens
-            self.token_usage['transcription']['total'] += token_count.total_tokens
-            self.token_usage['transcription']['chunks'] += 1
-            
-            # Update total token usage
-            self.token_usage['total']['prompt'] += token_count.prompt_tokens
-            self.token_usage['total']['completion'] += token_count.completion_tokens
-            self.token_usage['total']['total'] += token_count.total_tokens
-            
-            # Handle the response which could be a string or an object with 'text' attribute
-            response_text = response if isinstance(response, str) else response.text if hasattr(response, 'text') else str(response)
-            
-            # Save raw response for debugging
-            with open(os.path.join(self.output_dir, f"chunk_{start_time:.2f}_response.json"), "w") as f:
-                f.write(json.dumps({"text": response_text}, indent=2))
-            
-            # Parse response to extract transcription segments
-            segments = []
-            
-            # Try to extract JSON from the text response
-            json_data = self.client.extract_json(response_text)
-            
-            if not json_data or not isinstance(json_data, list):
+            json_lists, response_text = self._request_transcription(pending_chunks)
+            
+            if json_lists is not None:
+                # Convert every chunk before caching any, so a reply that doesn't
+                # convert falls back below and is never stored
+                converted = []
+                for i, json_data in zip(pending, json_lists):
+                    _, start_time, duration_sec = chunks[i]
+                    converted.append(self._to_video_segments(json_data, start_time, duration_sec))
+                
+                for i, json_data, segments in zip(pending, json_lists, converted):
+                    batch_segments[i] = segments
+                    self._store_cached_transcription(cache_keys[i], json_data)
+                print(f"Successfully transcribed {len(pending)} audio chunk(s) starting at {first_start:.2f}s")
+            elif len(pending) > 1:
+                # The reply could not be split per chunk, so ask for each chunk separately
+                print(f"Could not parse batched JSON. Transcribing {len(pending)} chunks individually.")
+                for i in pending:
+                    batch_segments[i] = self._transcribe_audio_batch([chunks[i]])[0]
+            else:
                 # Fallback: Create a single segment with the full response text
                 print(f"Could not parse JSON. Using full response text as a single segment.")
-                segments.append({
+                _, start_time, duration_sec = pending_chunks[0]
+                batch_segments[pending[0]] = [{
                     "text": response_text.strip(),
                     "start": start_time,
                     "end": start_time + duration_sec,
                     "type": "speech"  # Default type for fallback
-                })
-            else:
-                # Process each segment from the JSON response
-                for segment in json_data:
-                    # Adjust timing to be relative to the entire video
-                    segment_start = start_time + float(segment.get("start", 0))
-                    segment_end = start_time + float(segment.get("end", segment_start + 5.0))
-                    
-                    # Include the segment type if available
-                    segment_type = segment.get("type", "speech")
-                    
-                    segments.append({
-                        "text": segment.get("text", "[Transcription error]"),
-                        "start": segment_start,
-                        "end": segment_end,
-                        "type": segment_type
-                    })
-            
-            print(f"Successfully transcribed audio chunk, extracted {len(segments)} segments")
-            return segments
+                }]
             
         except Exception as e:
             print(f"Error processing audio with Gemini: {str(e)}")
             
             # Save error information
-            error_file = os.path.join(self.output_dir, f"chunk_{start_time:.2f}_error.txt")
+            error_file = os.path.join(self.output_dir, f"{self._chunk_stem(first_start)}_error.txt")
             with open(error_file, "w") as f:
-                f.write(f"Error at {start_time:.2f}s: {str(e)}")
+                f.write(f"Error at {first_start:.2f}s: {str(e)}")
             
-            # Create fallback segments with even timing
-            segments = []
+            for i in pending:
+                _, start_time, duration_sec = chunks[i]
+                batch_segments[i] = self._fallback_segments(start_time, duration_sec)
+
+    def _request_transcription(self, chunks: List[Tuple[bytes, float, float]]
+                               ) -> Tuple[Optional[List[List[Dict[str, any]]]], str]:
+        """
+        Send one or more audio chunks to Gemini in a single request.
+        
+        Args:
+            chunks: List of (audio_bytes, start_time, duration_sec) tuples in time order
             
-            for i in range(num_segments):
-                seg_start = start_time + (i * segment_duration)
-                seg_end = start_time + min((i + 1) * segment_duration, duration_sec)
-                
-                segments.append({
-                    "text": f"[Transcription unavailable {seg_start:.2f}s - {seg_end:.2f}s]",
-                    "start": seg_start,
-                    "end": seg_end,
-                    "type": "speech"  # Default type for fallback
-                })
-                
-            return segments
+        Returns:
+            Tuple of (one list of JSON segments per chunk with timing relative to the
+            chunk start, or None if the reply could not be parsed; raw response text)
+        """
+        # Create enhanced prompt for Gemini
+        prompt = f"""{TRANSCRIPTION_PROMPT}
+        The {len(chunks)} audio part(s) above are chunks of the same video, in time order but not
+        necessarily adjacent: silent or already transcribed chunks may have been left out. Each one
+        is followed by a marker line giving its chunk_index and its start time in the original
+        video. Transcribe every chunk on its own and use its marker to tell where it belongs.
+        
+        Return a JSON object with one entry per audio chunk, tagged with its chunk_index, whose
+        segments have times relative to the start of that chunk. Include chunks without any
+        captions with an empty segments list.
+        
+        Format:
+        {{"chunks": [
+            {{"chunk_index": 0, "segments": [
+                {{"text": "This is the first chunk", "start": 0.0, "end": 2.5, "type": "speech"}},
+                {{"text": "[♪ Upbeat music ♪]", "start": 2.5, "end": 5.0, "type": "music"}}
+            ]}},
+            {{"chunk_index": 1, "segments": [
+                {{"text": "[Sound: door slamming]", "start": 0.0, "end": 0.5, "type": "sound"}},
+                {{"text": "[Tense silence]", "start": 0.5, "end": 3.0, "type": "silence"}}
+            ]}}
+        ]}}
+        """
+        
+        # Create content with each audio part followed by its marker, then the text prompt
+        parts = []
+        for i, (audio_bytes, start_time, _) in enumerate(chunks):
+            parts.append(types.Part(inline_data=types.Blob(mime_type="audio/mp3", data=audio_bytes)))
+            parts.append(types.Part(text=f"--- chunk_index={i} start={start_time:.2f}s ---"))
+        parts.append(types.Part(text=prompt))
+        contents = [types.Content(role="user", parts=parts)]
+        
+        start_time = chunks[0][1]
+        print(f"Processing {len(chunks)} audio chunk(s) at {start_time:.2f}s with Gemini multimodal...")
+        
+        # Process with Gemini using the model that supports multimodal input and track tokens
+        with self._request_slots:
+            response, token_count = self.client.generate_content(
+                contents=contents,
+                model="gemini-2.0-flash-001",
+                return_json=True,
+                json_schema=TRANSCRIPTION_SCHEMA,
+                count_tokens=True
+            )
+        
+        # Update token usage statistics
+        self._record_token_usage('transcription', token_count, chunks=len(chunks), requests=1)
+        
+        if isinstance(response, dict) and set(response) == {"text"}:
+            # The client wraps replies it couldn't parse as {"text": ...}; scan the raw text instead
+            response_text = str(response["text"])
+            json_data = self.client.extract_json(response_text)
+        elif isinstance(response, (dict, list)):
+            # JSON mode already parsed the reply
+            json_data = response
+            response_text = orjson.dumps(response).decode()
+        else:
+            response_text = str(response)
+            json_data = self.client.extract_json(response_text)
+        
+        # Save raw response for debugging
+        if self.debug:
+            with open(os.path.join(self.output_dir, f"{self._chunk_stem(start_time)}_response.json"), "wb") as f:
+                f.write(orjson.dumps({"text": response_text}, option=orjson.OPT_INDENT_2))
+        
+        if isinstance(json_data, dict):
+            json_data = json_data.get("chunks", json_data.get("segments"))
+        
+        if not isinstance(json_data, list):
+            return None, response_text
+        
+        # A single chunk may come back as a plain list of segments
+        if len(chunks) == 1 and all(isinstance(item, dict) and "chunk_index" not in item for item in json_data):
+            return [json_data], response_text
+        
+        # Demultiplex the entries by chunk_index; every chunk must be accounted for
+        json_lists = [None] * len(chunks)
+        for entry in json_data:
+            if not isinstance(entry, dict) or not isinstance(entry.get("segments"), list):
+                return None, response_text
+            index = entry.get("chunk_index")
+            if not isinstance(index, int) or not 0 <= index < len(chunks):
+                return None, response_text
+            json_lists[index] = entry["segments"]
+        
+        if any(segments is None for segments in json_lists):
+            return None, response_text
+        return json_lists, response_text
+
+    def _chunk_stem(self, start_time: float) -> str:
+        """File name stem for the debug/error files of the chunk starting at start_time (seconds)."""
+        return _chunk_file_stem(int(round(start_time * 1000)))
+
+    def _to_video_segments(self, json_data: List[Dict[str, any]], start_time: float,
+                           duration_sec: float) -> List[Dict[str, any]]:
+        """
+        Convert JSON segments of one chunk into transcript segments.
+        
+        Args:
+            json_data: Segments returned by Gemini, timed relative to the chunk start
+            start_time: Start time of the chunk in the original audio (seconds)
+            duration_sec: Duration of the chunk in seconds
+            
+        Returns:
+            List of transcript segments with timing relative to the entire video
+        """
+        segments = []
+        for segment in json_data:
+            if not isinstance(segment, dict):
+                continue
+            
+            # Adjust timing to be relative to the entire video
+            relative_start = float(segment.get("start", 0))
+            segment_start = start_time + relative_start
+            segment_end = start_time + float(segment.get("end", relative_start + 5.0))
+            
+            segments.append({
+                "text": segment.get("text", "[Transcription error]"),
+                "start": segment_start,
+                "end": segment_end,
+                "type": segment.get("type", "speech")  # Include the segment type if available
+            })
+        return segments
 
-    def _format_captions(self, transcript_segments: List[Dict[str, any]], format_type: str) -> str:
+    def _fallback_segments(self, start_time: float, duration_sec: float) -> List[Dict[str, any]]:
+        """
+        Create placeholder segments with even timing for a chunk that could not be transcribed.
+        
+        Args:
+            start_time: Start time of the chunk in the original audio (seconds)
+            duration_sec: Duration of the chunk in seconds
+            
+        Returns:
+            List of placeholder transcript segments
+        """
+        segment_duration = 5.0  # seconds
+        num_segments = max(1, int(duration_sec / segment_duration))
+        
+        segments = []
+        for i in range(num_segments):
+            seg_start = start_time + (i * segment_duration)
+            seg_end = start_time + min((i + 1) * segment_duration, duration_sec)
+            
+            segments.append({
+                "text": f"[Transcription unavailable {seg_start:.2f}s - {seg_end:.2f}s]",
+                "start": seg_start,
+                "end": seg_end,
+                "type": "speech"  # Default type for fallback
+            })
+            
+        return segments
+
+    def _format_captions(self, transcript_segments: List[Dict[str, any]], format_type: str, out: TextIO):
         """
         Format transcript segments into the specified caption format.
         
         Args:
             transcript_segments: List of transcript segments with timing
             format_type: Output format (srt, vtt)
-            
-        Returns:
-            Formatted caption text
+            out: Text stream the captions are written to
         """
         if format_type.lower() == "srt":
-            return self._format_as_srt(transcript_segments)
+            self._format_as_srt(self._normalize_segments(transcript_segments), out)
         elif format_type.lower() == "vtt":
-            return self._format_as_vtt(transcript_segments)
+            self._format_as_vtt(self._normalize_segments(transcript_segments), out)
         else:
             raise ValueError(f"Unsupported format: {format_type}")
 
-    def _format_as_srt(self, segments: List[Dict[str, any]]) -> str:
-        """Format transcript as SubRip (SRT) format with enhanced styling for different content types."""
-        srt_content = []
+    def _normalize_segments(self, transcript_segments: List[Dict[str, any]]) -> List[Segment]:
+        """
+        Validate transcript segments and convert them to sorted, non-overlapping Segments.
         
-        # Sort segments by start time for proper sequencing
-        sorted_segments = sorted(segments, key=lambda x: x["start"])
+        Segments without usable timing are dropped. Segments starting at the same
+        time are merged, overlapping segments are trimmed at the start of the next
+        one, and zero-length segments are given MIN_SEGMENT_MS.
         
-        for i, segment in enumerate(sorted_segments, 1):
-            # Format timestamps as HH:MM:SS,mmm
-            start_time = self._format_srt_timestamp(segment["start"])
-            end_time = self._format_srt_timestamp(segment["end"])
-            
-            # Get the segment text
-            text = segment['text']
-            segment_type = segment.get('type', 'speech')
+        Args:
+            transcript_segments: List of transcript segments with timing in seconds
             
-            # Add styling based on content type (SRT doesn't support much styling,
-            # but we ensure proper formatting)
-            if segment_type == "music" and not text.startswith("[♪"):
-                text = f"[♪ {text} ♪]"
-            elif segment_type == "sound" and not text.startswith("[Sound:"):
-                text = f"[Sound: {text}]"
-            elif segment_type == "silence" and not text.startswith("["):
-                text = f"[{text}]"
+        Returns:
+            List of Segments in time order
+        """
+        parsed = []
+        for segment in transcript_segments:
+            if not isinstance(segment, dict):
+                continue
+            try:
+                start_ms = max(0, int(round(float(segment["start"]) * 1000)))
+                end_ms = int(round(float(segment["end"]) * 1000))
+            except (KeyError, TypeError, ValueError):
+                continue
+            text = str(segment.get("text", "")).strip()
+            if text:
+                parsed.append(Segment(start_ms, end_ms, text, segment.get("type") or "speech"))
+        
+        # Usually already in order, which Timsort handles in a single pass
+        parsed.sort(key=attrgetter("start_ms"))
+        
+        segments = []
+        for segment in parsed:
+            if segments:
+                previous = segments[-1]
+                if segment.start_ms == previous.start_ms:
+                    # Show simultaneous captions together
+                    previous.text = f"{previous.text}\n{segment.text}"
+                    previous.end_ms = max(previous.end_ms, segment.end_ms)
+                    continue
+                previous.end_ms = min(previous.end_ms, segment.start_ms)
+            if segment.end_ms <= segment.start_ms:
+                segment.end_ms = segment.start_ms + MIN_SEGMENT_MS
+            segments.append(segment)
+        
+        return segments
+
+    def _format_as_srt(self, segments: List[Segment], out: TextIO):
+        """Write transcript as SubRip (SRT) format with enhanced styling for different content types."""
+        # Bind the per-segment calls to locals once, outside the loop
+        format_ts = self._format_ts
+        get_styler = _SRT_STYLERS.get
+        write = out.write
+        
+        for i, segment in enumerate(segments, 1):
+            # Format timestamps as HH:MM:SS,mmm
+            start_time = format_ts(segment.start_ms, ",")
+            end_time = format_ts(segment.end_ms, ",")
             
-            srt_content.append(f"{i}")
-            srt_content.append(f"{start_time} --> {end_time}")
-            srt_content.append(f"{text}")
-            srt_content.append("")  # Empty line between entries
+            # Add styling based on content type (speech is left as-is)
+            text = get_styler(segment.type, str)(segment.text)
             
-        return "\n".join(srt_content)
+            # One write per entry, with an empty line between entries
+            write(f"{i}\n{start_time} --> {end_time}\n{text}\n\n")
 
-    def _format_as_vtt(self, segments: List[Dict[str, any]]) -> str:
-        """Format transcript as WebVTT format with enhanced styling for different content types."""
-        vtt_content = ["WEBVTT", ""]  # Header and blank line
+    def _format_as_vtt(self, segments: List[Segment], out: TextIO):
+        """Write transcript as WebVTT format with enhanced styling for different content types."""
+        # Bind the per-segment calls to locals once, outside the loop
+        format_ts = self._format_ts
+        get_styler = _VTT_STYLERS.get
+        write = out.write
         
-        # Sort segments by start time for proper sequencing
-        sorted_segments = sorted(segments, key=lambda x: x["start"])
+        write("WEBVTT\n\n")  # Header and blank line
         
-        for i, segment in enumerate(sorted_segments, 1):
+        for i, segment in enumerate(segments, 1):
             # Format timestamps as HH:MM:SS.mmm
-            start_time = self._format_vtt_timestamp(segment["start"])
-            end_time = self._format_vtt_timestamp(segment["end"])
-            
-            # Get the segment text
-            text = segment['text']
-            segment_type = segment.get('type', 'speech')
-            
-            # WebVTT supports more styling options
-            if segment_type == "music" and not text.startswith("[♪"):
-                # Italics for music
-                text = f"<i>[♪ {text} ♪]</i>"
-            elif segment_type == "sound" and not text.startswith("[Sound:"):
-                # Bold for sound effects
-                text = f"<b>[Sound: {text}]</b>"
-            elif segment_type == "silence" and not text.startswith("["):
-                text = f"[{text}]"
-            
-            # Add cue identifier
-            vtt_content.append(f"cue-{i}")
-            vtt_content.append(f"{start_time} --> {end_time}")
-            vtt_content.append(f"{text}")
-            vtt_content.append("")  # Empty line between entries
-            
-        return "\n".join(vtt_content)
-
-    def _format_srt_timestamp(self, seconds: float) -> str:
-        """Format seconds as SRT timestamp: HH:MM:SS,mmm"""
-        hours, remainder = divmod(seconds, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        return f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d},{int((seconds % 1) * 1000):03d}"
-
-    def _format_vtt_timestamp(self, seconds: float) -> str:
-        """Format seconds as WebVTT timestamp: HH:MM:SS.mmm"""
-        hours, remainder = divmod(seconds, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        return f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}.{int((seconds % 1) * 1000):03d}"
-
-    def _add_soft_subtitles(self, video_path: str, subtitle_path: str, output_path: str) -> str:
+            start_time = format_ts(segment.start_ms, ".")
+            end_time = format_ts(segment.end_ms, ".")
+            
+            # Add styling based on content type (speech is left as-is)
+            text = get_styler(segment.type, str)(segment.text)
+            
+            # One write per cue (with identifier), with an empty line between cues
+            write(f"cue-{i}\n{start_time} --> {end_time}\n{text}\n\n")
+
+    def _format_ts(self, total_ms: int, sep: str) -> str:
+        """
+        Format milliseconds as a caption timestamp: HH:MM:SS<sep>mmm
+        
+        Args:
+            total_ms: Time in whole milliseconds
+            sep: Separator before the milliseconds ("," for SRT, "." for WebVTT)
+            
+        Returns:
+            Formatted timestamp
+        """
+        hours, remainder = divmod(total_ms, 3_600_000)
+        minutes, remainder = divmod(remainder, 60_000)
+        secs, millis = divmod(remainder, 1000)
+        # Hours only outgrow the table for videos longer than 100 hours
+        hours_text = _PAD2[hours] if hours < 100 else str(hours)
+        return f"{hours_text}:{_PAD2[minutes]}:{_PAD2[secs]}{sep}{_PAD3[millis]}"
+
+    def _add_soft_subtitles(self, video_path: str, subtitle_paths: List[str], output_path: str) -> str:
         """
         Add soft subtitles to a video file using ffmpeg.
         
+        All subtitle files are muxed in a single ffmpeg run, so the video is
+        only read once however many tracks are added.
+        
         Args:
             video_path: Path to the input video file
-            subtitle_path: Path to the subtitle file (.srt)
+            subtitle_paths: Paths to the subtitle files (.srt or .vtt), one track each
             output_path: Path where the output video will be saved
             
         Returns:
@@ -905,25 +1642,37 @@ class VideoProcessor:
         print(f"Adding subtitles to video...")
         
         # Command to add soft subtitles without re-encoding
-        cmd = [
-            "ffmpeg", 
-            "-i", video_path, 
-            "-i", subtitle_path, 
-            "-c:v", "copy",  # Copy video stream (no re-encoding)
-            "-c:a", "copy",  # Copy audio stream (no re-encoding)
+        cmd = [FFMPEG_BIN, "-i", video_path]
+        for subtitle_path in subtitle_paths:
+            cmd += ["-i", subtitle_path]
+        
+        cmd += [
+            "-map", "0:v",  # All video streams
+            "-map", "0:a?",  # All audio streams, if any
+        ]
+        for track in range(len(subtitle_paths)):
+            cmd += ["-map", f"{track + 1}:0"]  # The new captions are the only subtitle streams
+        
+        cmd += [
+            "-c", "copy",  # Copy audio and video as-is (no re-encoding)
             "-c:s", "mov_text",  # Use mov_text codec for subtitles (compatible with MP4)
-            "-metadata:s:s:0", "language=eng",  # Set subtitle language to English
+        ]
+        for track in range(len(subtitle_paths)):
+            cmd += [f"-metadata:s:s:{track}", "language=eng"]  # Set subtitle language to English
+        
+        cmd += [
+            "-nostats",
+            "-loglevel", "error",  # Only log what's needed to report a failure
             "-y",  # Overwrite output file if it exists
             output_path
         ]
         
         try:
-            subprocess.run(cmd, check=True, text=True, capture_output=True)
+            _run_ffmpeg(cmd)
             print(f"Successfully created video with subtitles: {output_path}")
             return output_path
         except subprocess.CalledProcessError as e:
             print(f"Error adding subtitles: {e}")
-            print(f"ffmpeg stdout: {e.stdout}")
             print(f"ffmpeg stderr: {e.stderr}")
             raise RuntimeError("Failed to add subtitles to video.")
 
@@ -941,10 +1690,16 @@ def main():
     parser.add_argument("-p", "--project", help="Google Cloud Project ID")
     parser.add_argument("-c", "--chunk-size", type=int, default=30,
                         help="Size of audio chunks in seconds (default: 30)")
+    parser.add_argument("-b", "--batch-chunks", type=int, default=4,
+                        help="Number of audio chunks sent to Gemini per request (default: 4)")
     parser.add_argument("--skip-captions", action="store_true",
                         help="Skip caption generation (use existing caption file)")
     parser.add_argument("--skip-embedding", action="store_true",
                         help="Skip embedding captions (just generate caption file)")
+    parser.add_argument("--debug", action="store_true",
+                        help="Save each chunk's audio and raw Gemini response in the output folder")
+    parser.add_argument("--llm-retiming", action="store_true",
+                        help="Ask Gemini to re-time the final captions instead of using local timing rules")
     
     args = parser.parse_args()
     
@@ -952,7 +1707,10 @@ def main():
         # Initialize the video processor
         processor = VideoProcessor(
             project_id=args.project,
-            chunk_size_seconds=args.chunk_size
+            chunk_size_seconds=args.chunk_size,
+            batch_chunks=args.batch_chunks,
+            debug=args.debug,
+            enable_llm_retiming=args.llm_retiming
         )
         
         # Process the video
@@ -56,12 +56,47 @@ document.addEventListener('DOMContentLoaded', function() {
             }
             
             // If validation passes, show loading state
-            if (document.querySelector('button[type="submit"]')) {
-                document.querySelector('button[type="submit"]').disabled = true;
-                document.querySelector('button[type="submit"]').innerHTML = 
+            const submitButton = document.querySelector('button[type="submit"]');
+            if (submitButton) {
+                submitButton.disabled = true;
+                submitButton.innerHTML = 
                     '<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span> Processing...';
             }
             
+            // Send uploaded files as the raw request body so the server can
+            // stream them to disk instead of parsing a multipart form
+            if (videoFile) {
+                e.preventDefault();
+                const captionFormat = document.getElementById('caption_format').value;
+                const csrfToken = document.getElementById('csrf_token').value;
+                
+                fetch(`/upload-stream/${captionFormat}?filename=${encodeURIComponent(videoFile.name)}`, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': videoFile.type || 'application/octet-stream',
+                        'X-CSRFToken': csrfToken
+                    },
+                    body: videoFile
+                })
+                    .then(response => {
+                        if (!response.ok) {
+                            throw new Error(`Upload failed (${response.status})`);
+                        }
+                        return response.json();
+                    })
+                    .then(data => {
+                        window.location.href = data.results_url;
+                    })
+                    .catch(error => {
+                        alert(error.message);
+                        if (submitButton) {
+                            submitButton.disabled = false;
+                            submitButton.textContent = 'Process Video';
+                        }
+                    });
+                return false;
+            }
+            
             return true;
         });
     }
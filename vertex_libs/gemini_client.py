@@ -16,8 +16,10 @@
 
 import os
 import json
+import orjson
 import logging
 import asyncio
+import threading
 from typing import Optional, List, Union, Dict, Tuple, Any, Callable, Generator, Iterable
 from dataclasses import dataclass
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
@@ -90,14 +92,23 @@ class GeminiClient:
             response_modalities=["TEXT"],
             safety_settings=self.safety_settings
         )
+        
+        # One client per region, reused so requests share pooled keep-alive connections
+        self._clients = {}
+        self._clients_lock = threading.Lock()
 
     def _initialize_client(self, region: str):
-        """Initialize Gemini client with the specified region."""
-        return genai.Client(
-            vertexai=True,
-            project=self.project_id,
-            location=region
-        )
+        """Get the Gemini client for the specified region, creating it on first use."""
+        with self._clients_lock:
+            client = self._clients.get(region)
+            if client is None:
+                client = genai.Client(
+                    vertexai=True,
+                    project=self.project_id,
+                    location=region
+                )
+                self._clients[region] = client
+            return client
 
     def count_tokens(self, contents: List[types.Content], model: Optional[str] = None) -> TokenCount:
         """
@@ -148,6 +159,12 @@ class GeminiClient:
                 # Clean up the text
                 text = response.text.strip()
                 
+                # In JSON mode the text is normally the JSON document itself
+                try:
+                    return orjson.loads(text)
+                except json.JSONDecodeError:
+                    pass
+                
                 # Handle markdown code blocks
                 if '```json' in text:
                     # Extract JSON from code block
@@ -158,16 +175,16 @@ class GeminiClient:
                 
                 # Try to parse as JSON
                 if text.startswith('{') and text.endswith('}'):
-                    return json.loads(text)
+                    return orjson.loads(text)
                 elif text.startswith('[') and text.endswith(']'):
-                    return json.loads(text)
+                    return orjson.loads(text)
                 
                 # If text contains embedded JSON object/array, try to extract it
                 json_pattern = r'\{[^{}]*\}|\[[^\[\]]*\]'
                 matches = re.finditer(json_pattern, text)
                 for match in matches:
                     try:
-                        return json.loads(match.group())
+                        return orjson.loads(match.group())
                     except json.JSONDecodeError:
                         continue
             except json.JSONDecodeError:
@@ -244,16 +261,30 @@ class GeminiClient:
         
         # Try direct JSON parsing first
         try:
-            return json.loads(text)
+            return orjson.loads(text)
         except json.JSONDecodeError:
             pass
         
+        # Most replies wrap a single JSON value in prose or a code fence, so try
+        # the span from the first opening bracket to the matching last closing one
+        spans = []
+        for open_char, close_char in (('{', '}'), ('[', ']')):
+            start = text.find(open_char)
+            end = text.rfind(close_char)
+            if start != -1 and end > start:
+                spans.append((start, end))
+        for start, end in sorted(spans):
+            try:
+                return orjson.loads(text[start:end + 1])
+            except json.JSONDecodeError:
+                continue
+        
         # Extract JSON from code blocks (```json {...} ```)
         code_block_pattern = r'```(?:json)?\s*(.+?)```'
         matches = re.findall(code_block_pattern, text, re.DOTALL)
         for match in matches:
             try:
-                return json.loads(match.strip())
+                return orjson.loads(match.strip())
             except json.JSONDecodeError:
                 continue
         
@@ -262,7 +293,7 @@ class GeminiClient:
         matches = re.findall(json_pattern, text, re.DOTALL)
         for match in matches:
             try:
-                return json.loads(match)
+                return orjson.loads(match)
             except json.JSONDecodeError:
                 continue
         
@@ -348,8 +379,11 @@ class GeminiClient:
         if return_json:
             if not json_schema:
                 json_schema = {"type": "OBJECT", "properties": {"response": {"type": "STRING"}}}
-            gen_config.response_mime_type = "application/json"
-            gen_config.response_schema = json_schema
+            # Copy the config so JSON mode doesn't leak into later calls sharing it
+            gen_config = gen_config.model_copy(update={
+                "response_mime_type": "application/json",
+                "response_schema": json_schema
+            })
 
         if count_tokens:
             token_count = self.count_tokens(contents, model=model)